@@ -8,7 +8,7 @@ import time
 import logging
 import stat
 from pathlib import Path
-from typing import Optional
+from typing import BinaryIO, Optional, Union
 
 LOG = logging.getLogger(__name__)
 
@@ -76,7 +76,7 @@ def _write_fileobj_to_path(
 
 # Extract into a sibling temporary directory and atomically swap into place
 def safe_extract_atomic(
-    tar_path: Path,
+    tar_path: Union[Path, BinaryIO],
     dest_dir: Path,
     *,
     max_files: Optional[int] = None,
@@ -95,9 +95,13 @@ def safe_extract_atomic(
        Both renames use Path.replace(src, dst) (class-call) to be compatible with mocks.
     - Attempts best-effort rollback if the swap fails.
     - Honors dry_run (validate without writing), max_files and max_bytes limits.
+    - tar_path may also be an open binary file object (e.g. io.BytesIO); it is
+      read from its current position and left open.
     """
-    if not tar_path.exists() or not tar_path.is_file():
+    is_fileobj = hasattr(tar_path, "read")
+    if not is_fileobj and (not tar_path.exists() or not tar_path.is_file()):
         raise FileNotFoundError(f"Archive not found: {tar_path}")
+    open_kwargs = {"fileobj": tar_path} if is_fileobj else {"name": tar_path}
 
     dest_dir = dest_dir.resolve()
     dest_parent = dest_dir.parent
@@ -118,7 +122,7 @@ def safe_extract_atomic(
     seen_bytes = 0
 
     try:
-        with tarfile.open(tar_path, "r:*") as tf:
+        with tarfile.open(mode="r:*", **open_kwargs) as tf:
             for member in tf:
                 # Skip pax/global headers if allowed
                 if allow_pax and member.type in (
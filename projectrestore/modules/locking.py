@@ -5,6 +5,7 @@ import os
 import time
 import logging
 from pathlib import Path
+from typing import Callable, Optional
 
 LOG = logging.getLogger(__name__)
 
@@ -21,7 +22,16 @@ def _is_process_alive(pid: int) -> bool:
     return True
 
 
-def create_pid_lock(lockfile: Path, stale_seconds: int = 3600) -> None:
+def create_pid_lock(
+    lockfile: Path,
+    stale_seconds: int = 3600,
+    *,
+    clock: Optional[Callable[[], float]] = None,
+    is_alive: Optional[Callable[[int], bool]] = None,
+) -> None:
+    # clock/is_alive default to time.time/_is_process_alive, looked up per call
+    clock = clock or time.time
+    is_alive = is_alive or _is_process_alive
     pid_str = str(os.getpid())
     lockfile.parent.mkdir(parents=True, exist_ok=True)
     try:
@@ -39,7 +49,7 @@ def create_pid_lock(lockfile: Path, stale_seconds: int = 3600) -> None:
             existing_pid = None
 
         if existing_pid:
-            if _is_process_alive(existing_pid):
+            if is_alive(existing_pid):
                 LOG.error(
                     "Another instance is running (pid=%s). Exiting.", existing_pid
                 )
@@ -47,7 +57,7 @@ def create_pid_lock(lockfile: Path, stale_seconds: int = 3600) -> None:
             else:
                 # stale check by mtime
                 try:
-                    age = time.time() - lockfile.stat().st_mtime
+                    age = clock() - lockfile.stat().st_mtime
                 except Exception:
                     age = stale_seconds + 1
                 if age < stale_seconds:
@@ -84,7 +94,7 @@ def create_pid_lock(lockfile: Path, stale_seconds: int = 3600) -> None:
         else:
             # unreadable content; remove if stale
             try:
-                age = time.time() - lockfile.stat().st_mtime
+                age = clock() - lockfile.stat().st_mtime
             except Exception:
                 age = stale_seconds + 1
             if age >= stale_seconds:
@@ -0,0 +1,533 @@
+# src/projectrestore/modules/uring.py
+
+from __future__ import annotations
+import errno
+import logging
+import os
+import threading
+from typing import Callable, List, Optional, Sequence, Set, Tuple
+
+try:
+    import liburing
+except ImportError:
+    liburing = None
+
+LOG = logging.getLogger(__name__)
+
+# Number of SQEs per submission batch.
+BATCH_SIZE = 256
+# Objects larger than this are not buffered in memory; they go through `fallback`.
+MAX_BUFFERED_SIZE = 64 * 1024 * 1024
+# Read buffers (and, separately, decoded payloads) held by one batch; jobs past
+# the budget go through `fallback` as well.
+MAX_BATCH_BYTES = 256 * 1024 * 1024
+# Size of each registered read slab; objects up to this size are read with
+# READ_FIXED into the engine's slab pool (one slab per fixed file slot).
+SLAB_SIZE = 64 * 1024
+
+# Objects are opened as direct (fixed) descriptors, which reject O_CLOEXEC
+_OPEN_SRC_FLAGS = os.O_RDONLY
+_OPEN_DST_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | os.O_CLOEXEC
+# Same default mode (0o666 & ~umask) as open(..., "wb")
+_DST_MODE = 0o666
+
+# A copy job: (object name inside objects_dir, file_dest)
+Job = Tuple[str, str]
+
+# user_data of the cancel request submitted when a batch is aborted
+_CANCEL_USER_DATA = 2**63 - 1
+
+# State of batches whose requests could not be drained after an abort; the
+# kernel may still write into these buffers, so they are never freed
+_abandoned: list = []
+
+
+class PayloadTooLarge(Exception):
+    """Raised by `decode` for payloads too large to hold in memory; the job goes through `fallback`."""
+
+
+def is_available() -> bool:
+    return liburing is not None
+
+
+def _setup_flag_sets() -> List[int]:
+    """
+    Ring setup flags, most preferred first.
+
+    SQPOLL removes submission syscalls entirely; DEFER_TASKRUN only batches
+    completion work. The kernel rejects the two together (EINVAL), so they
+    are tried as alternatives. R_DISABLED lets the restore thread enable
+    the ring itself, which makes it the SINGLE_ISSUER owner.
+    """
+    L = liburing
+    return [
+        L.IORING_SETUP_SQPOLL | L.IORING_SETUP_SINGLE_ISSUER | L.IORING_SETUP_R_DISABLED,
+        L.IORING_SETUP_SINGLE_ISSUER
+        | L.IORING_SETUP_DEFER_TASKRUN
+        | L.IORING_SETUP_R_DISABLED,
+        0,
+    ]
+
+
+class UringRestoreEngine:
+    """
+    Copies vault objects to destination files through a single io_uring.
+
+    Each batch of jobs goes through four submissions:
+      1) statx of every object (relative to the objects dir fd) and openat of
+         every destination
+      2) per object: openat into a registered (fixed) file slot -> read from
+         that slot (into a registered slab for objects up to SLAB_SIZE) -> close
+         the slot, as one linked chain
+      3) write of every destination
+      4) close of every destination
+    Object payloads are passed through `decode` (e.g. zstd inflate) in user space
+    between the read and write passes, and `finish` (e.g. fchmod/futimens) runs on
+    each written destination fd between the write and close passes. Payloads that
+    `decode` leaves as is are byte copies of the object and keep its mode and
+    times (from the statx pass), like shutil.copy2.
+
+    Raises OSError from the constructor if the ring cannot be set up (liburing
+    missing, kernel without sparse fixed files (< 5.19), io_uring disabled by
+    seccomp/sysctl); callers are expected to fall back to the regular copy path.
+    """
+
+    def __init__(self, objects_dir: str, entries: int = BATCH_SIZE) -> None:
+        if liburing is None:
+            raise OSError("liburing is not installed")
+        self.objects_dir = objects_dir
+        self._entries = entries
+        # statx + openat per job in pass 1, three linked SQEs per job in pass 2
+        self._per_batch = max(1, entries // 3)
+        self._ring = liburing.Ring()
+        self._cqe = liburing.Cqe()
+        self._owner: Optional[int] = None
+        # SQEs handed out but not yet submitted / submitted but not yet reaped
+        self._queued = 0
+        self._inflight = 0
+        # Registered read slabs, one per fixed file slot (None: plain reads)
+        self._slabs: Optional[List[bytearray]] = None
+        self._iovecs = None
+
+        last_error: Optional[OSError] = None
+        for flags in _setup_flag_sets():
+            try:
+                liburing.io_uring_queue_init(entries, self._ring, flags)
+            except OSError as e:
+                last_error = e
+                self._ring = liburing.Ring()
+                continue
+            self.flags = flags
+            break
+        else:
+            raise last_error or OSError("io_uring setup failed")
+
+        self._closed = False
+        self._objects_fd = -1
+        try:
+            self._objects_fd = os.open(
+                objects_dir, os.O_RDONLY | os.O_DIRECTORY | os.O_CLOEXEC
+            )
+            liburing.io_uring_register_files_sparse(self._ring, self._per_batch)
+        except Exception:
+            self.close()
+            raise
+        self._register_slabs()
+
+    def close(self) -> None:
+        if not self._closed:
+            self._closed = True
+            liburing.io_uring_queue_exit(self._ring)
+            self._slabs = self._iovecs = None
+            if self._objects_fd >= 0:
+                os.close(self._objects_fd)
+                self._objects_fd = -1
+
+    def __enter__(self) -> "UringRestoreEngine":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # ---------------- ring helpers ----------------
+    def _enable(self) -> None:
+        """Enable an R_DISABLED ring from the thread that drives it."""
+        if self._owner is None:
+            if self.flags & liburing.IORING_SETUP_R_DISABLED:
+                liburing.io_uring_enable_rings(self._ring)
+            self._owner = threading.get_ident()
+        elif self._owner != threading.get_ident():
+            raise RuntimeError("UringRestoreEngine used from more than one thread")
+
+    def _register_slabs(self) -> None:
+        """
+        Register the slab pool once for the engine's lifetime, so reads into it
+        skip per-request page pinning. If registration is refused (e.g. the pinned
+        pages exceed RLIMIT_MEMLOCK), every object is read with a plain READ.
+        """
+        slabs = [bytearray(SLAB_SIZE) for _ in range(self._per_batch)]
+        try:
+            iovecs = liburing.Iovec(slabs)
+            liburing.io_uring_register_buffers(self._ring, iovecs)
+        except (OSError, ValueError, TypeError) as e:
+            LOG.debug("io_uring buffer registration failed (%s); using plain reads", e)
+            return
+        # Must outlive the registration
+        self._slabs, self._iovecs = slabs, iovecs
+
+    def _sqe(self):
+        sqe = liburing.io_uring_get_sqe(self._ring)
+        if sqe is None:
+            raise RuntimeError("io_uring submission queue is full")
+        # A NOP until prepared, so an SQE whose prep raised never replays a stale op
+        liburing.io_uring_prep_nop(sqe)
+        self._queued += 1
+        return sqe
+
+    def _submit(self) -> None:
+        # Every prepared SQE is flushed to the ring (under SQPOLL the return value
+        # counts entries the poller has not consumed yet, so it is not used)
+        liburing.io_uring_submit(self._ring)
+        self._inflight += self._queued
+        self._queued = 0
+
+    def _reap(self, results: dict, count: int) -> None:
+        """Wait for `count` more completions, recording them as {user_data: res}."""
+        while count > 0:
+            liburing.io_uring_wait_cqe_nr(self._ring, self._cqe, count)
+            # CqeIter walks the ready CQEs through the ring mask (indexing the Cqe
+            # directly does not survive CQ wrap-around)
+            seen = 0
+            for _ in liburing.CqeIter(self._ring, self._cqe):
+                cqe = self._cqe[0]
+                user_data = cqe.user_data
+                try:
+                    res = cqe.res
+                except OSError as e:
+                    # liburing raises for negative results; keep them as -errno
+                    res = -(e.errno or 1)
+                results[user_data] = res
+                seen += 1
+            liburing.io_uring_cq_advance(self._ring, seen)
+            self._inflight -= seen
+            count -= seen
+
+    def _submit_and_reap(self, expected: int) -> dict:
+        """Submit queued SQEs and wait for `expected` completions: {user_data: res}."""
+        results = {}
+        if not expected:
+            return results
+        self._submit()
+        self._reap(results, expected)
+        return results
+
+    def _drain(self) -> None:
+        """
+        Cancel every request still queued or in flight and wait for all of their
+        completions, so the buffers and fds they reference can be released.
+        queue_exit alone does not wait for in-flight reads and writes.
+        """
+        L = liburing
+        sqe = L.io_uring_get_sqe(self._ring)
+        if sqe is None:
+            self._submit()
+            sqe = L.io_uring_get_sqe(self._ring)
+        L.io_uring_prep_cancel64(
+            sqe, 0, L.IORING_ASYNC_CANCEL_ALL | L.IORING_ASYNC_CANCEL_ANY
+        )
+        sqe.user_data = _CANCEL_USER_DATA
+        self._queued += 1
+        self._submit()
+        self._reap({}, self._inflight)
+
+    # ---------------- public API ----------------
+    def restore_files(
+        self,
+        jobs: Sequence[Job],
+        decode: Optional[Callable[[bytearray], bytes]] = None,
+        fallback: Optional[Callable[[str, str], None]] = None,
+        finish: Optional[Callable[[int, int], None]] = None,
+    ) -> List[Optional[Exception]]:
+        """
+        Copy every (object_name, file_dest) job.
+
+        Objects above MAX_BUFFERED_SIZE, past a batch's MAX_BATCH_BYTES, or whose
+        `decode` raises PayloadTooLarge are handed to
+        `fallback(job_index, object_source, file_dest)` instead of being held in
+        memory; so is every remaining job if the ring fails mid-restore.
+        `finish(job_index, fd)` is called for every destination written through
+        the ring, while its fd is still open.
+
+        Returns a list aligned with `jobs`: None on success, or the exception
+        (OSError with `filename` set to the offending path) that made the job fail.
+        A failed job never leaves a partial destination file behind.
+        """
+        self._enable()
+        errors: List[Optional[Exception]] = []
+        failure: Optional[Exception] = None
+        per_batch = self._per_batch
+        for start in range(0, len(jobs), per_batch):
+            batch = jobs[start : start + per_batch]
+            if not self._closed:
+                try:
+                    errors.extend(
+                        self._restore_batch(batch, decode, fallback, finish, start)
+                    )
+                    continue
+                except Exception as e:
+                    # The ring is torn down; this batch and the rest are copied
+                    # without it
+                    LOG.debug("io_uring batch failed (%s); using fallback", e)
+                    failure = e
+            errors.extend(self._copy_without_ring(batch, fallback, start, failure))
+        return errors
+
+    def _copy_without_ring(
+        self, jobs: Sequence[Job], fallback, start: int, failure
+    ) -> List[Optional[Exception]]:
+        errors: List[Optional[Exception]] = []
+        for i, (name, dst) in enumerate(jobs):
+            if fallback is None:
+                errors.append(failure or OSError(errno.EBADF, "io_uring engine is closed"))
+                continue
+            try:
+                fallback(start + i, os.path.join(self.objects_dir, name), dst)
+                errors.append(None)
+            except Exception as e:
+                errors.append(e)
+        return errors
+
+    def _restore_batch(
+        self, jobs: Sequence[Job], decode, fallback, finish, start: int
+    ) -> List[Optional[Exception]]:
+        L = liburing
+        n = len(jobs)
+        objects_fd = self._objects_fd
+        sources = [os.path.join(self.objects_dir, name) for name, _ in jobs]
+        errors: List[Optional[Exception]] = [None] * n
+        # Jobs left to `fallback` (too large for the batch's buffers)
+        deferred: Set[int] = set()
+        dst_fds: List[int] = [-1] * n
+        closing = False
+        # Everything the kernel may write into; kept alive until drained
+        stats = buffers = payloads = tails = None
+        slabs = self._slabs
+        try:
+            stats = [L.Statx() for _ in range(n)]
+            statx_mask = L.STATX_SIZE | L.STATX_MODE | L.STATX_ATIME | L.STATX_MTIME
+
+            # user_data layout: job index * 4 + slot
+            # --- Pass 1: statx objects, open destinations ---
+            for i, (name, dst) in enumerate(jobs):
+                sqe = self._sqe()
+                L.io_uring_prep_statx(sqe, stats[i], name, 0, statx_mask, objects_fd)
+                sqe.user_data = i * 4
+                sqe = self._sqe()
+                L.io_uring_prep_open(sqe, dst, _OPEN_DST_FLAGS, _DST_MODE)
+                sqe.user_data = i * 4 + 1
+            res = self._submit_and_reap(2 * n)
+
+            sizes: List[int] = [0] * n
+            buffered = 0
+            for i, (name, dst) in enumerate(jobs):
+                st, dfd = res[i * 4], res[i * 4 + 1]
+                if dfd >= 0:
+                    dst_fds[i] = dfd
+                if st < 0:
+                    errors[i] = OSError(-st, os.strerror(-st), sources[i])
+                elif dfd < 0:
+                    errors[i] = OSError(-dfd, os.strerror(-dfd), dst)
+                elif fallback is not None and (
+                    stats[i].size > MAX_BUFFERED_SIZE
+                    or buffered + stats[i].size > MAX_BATCH_BYTES
+                ):
+                    deferred.add(i)
+                else:
+                    sizes[i] = stats[i].size
+                    buffered += sizes[i]
+
+            # --- Pass 2: open object into fixed slot i -> read -> close slot ---
+            buffers: List[Optional[bytearray]] = [None] * n
+            # Jobs read into their registered slab (slab i belongs to fixed slot i);
+            # READ_FIXED asks for the whole slab and stops short at EOF
+            fixed: Set[int] = set()
+            for i in range(n):
+                if errors[i] is None and i not in deferred:
+                    if slabs is not None and sizes[i] <= SLAB_SIZE:
+                        buffers[i] = slabs[i]
+                        fixed.add(i)
+                    else:
+                        buffers[i] = bytearray(sizes[i])
+
+            expected = 0
+            for i, (name, dst) in enumerate(jobs):
+                if buffers[i] is None:
+                    continue
+                sqe = self._sqe()
+                L.io_uring_prep_open_direct(sqe, name, _OPEN_SRC_FLAGS, i, 0, objects_fd)
+                L.io_uring_sqe_set_flags(sqe, L.IOSQE_IO_LINK)
+                sqe.user_data = i * 4
+                sqe = self._sqe()
+                if i in fixed:
+                    L.io_uring_prep_read_fixed(sqe, i, buffers[i], i, 0)
+                else:
+                    L.io_uring_prep_read(sqe, i, buffers[i], 0)
+                L.io_uring_sqe_set_flags(sqe, L.IOSQE_FIXED_FILE | L.IOSQE_IO_HARDLINK)
+                sqe.user_data = i * 4 + 1
+                sqe = self._sqe()
+                L.io_uring_prep_close_direct(sqe, i)
+                sqe.user_data = i * 4 + 2
+                expected += 3
+            res = self._submit_and_reap(expected)
+
+            payloads: List[Optional[bytes]] = [None] * n
+            raw: Set[int] = set()
+            decoded = 0
+            for i in range(n):
+                if buffers[i] is None:
+                    continue
+                src = sources[i]
+                opened, got = res[i * 4], res[i * 4 + 1]
+                if opened < 0:
+                    errors[i] = OSError(-opened, os.strerror(-opened), src)
+                elif got < 0:
+                    errors[i] = OSError(-got, os.strerror(-got), src)
+                elif got != sizes[i]:
+                    # Short read (legal, e.g. on network filesystems) or the object
+                    # changed since statx; the fallback copies it from scratch
+                    if fallback is None:
+                        errors[i] = OSError(
+                            errno.EIO, f"Short read ({got}/{sizes[i]} bytes)", src
+                        )
+                    else:
+                        deferred.add(i)
+                else:
+                    if i in fixed:
+                        # The slab is reused by the next batch
+                        buffers[i] = slabs[i][:got]
+                    try:
+                        payloads[i] = decode(buffers[i]) if decode else buffers[i]
+                    except PayloadTooLarge as e:
+                        if fallback is None:
+                            errors[i] = OSError(f"Failed to decode object {src}: {e}")
+                        else:
+                            deferred.add(i)
+                    except Exception as e:
+                        errors[i] = OSError(f"Failed to decode object {src}: {e}")
+                if payloads[i] is buffers[i]:
+                    raw.add(i)
+                else:
+                    buffers[i] = None
+                    if payloads[i] is not None and fallback is not None:
+                        decoded += len(payloads[i])
+                        if decoded > MAX_BATCH_BYTES:
+                            decoded -= len(payloads[i])
+                            payloads[i] = None
+                            deferred.add(i)
+
+            # --- Pass 3: write destinations ---
+            # Short writes are legal (quota limits, network filesystems); the rest
+            # of the payload is resubmitted at the advanced offset
+            written = {}  # job index -> bytes written so far
+            todo = [
+                i
+                for i in range(n)
+                if dst_fds[i] >= 0 and errors[i] is None and payloads[i]
+            ]
+            while todo:
+                # Resubmitted tails must outlive their request
+                tails = {}
+                for i in todo:
+                    offset = written.get(i, 0)
+                    data = payloads[i][offset:] if offset else payloads[i]
+                    tails[i] = data
+                    sqe = self._sqe()
+                    L.io_uring_prep_write(sqe, dst_fds[i], data, offset)
+                    sqe.user_data = i * 4 + 2
+                res = self._submit_and_reap(len(todo))
+                retry = []
+                for i in todo:
+                    wrote = res[i * 4 + 2]
+                    dst = jobs[i][1]
+                    if wrote < 0:
+                        errors[i] = OSError(-wrote, os.strerror(-wrote), dst)
+                    elif wrote == 0:
+                        total = len(payloads[i])
+                        errors[i] = OSError(
+                            errno.EIO, f"Short write ({written.get(i, 0)}/{total} bytes)", dst
+                        )
+                    else:
+                        written[i] = written.get(i, 0) + wrote
+                        if written[i] < len(payloads[i]):
+                            retry.append(i)
+                todo = retry
+                tails = None
+            buffers = None
+
+            for i, (name, dst) in enumerate(jobs):
+                if errors[i] is not None or i in deferred or dst_fds[i] < 0:
+                    continue
+                try:
+                    if i in raw:
+                        os.fchmod(dst_fds[i], stats[i].mode & 0o7777)
+                        os.utime(dst_fds[i], (stats[i].atime, stats[i].mtime))
+                    if finish is not None:
+                        finish(start + i, dst_fds[i])
+                except Exception as e:
+                    errors[i] = e
+            payloads = None
+
+            # --- Pass 4: close destinations ---
+            expected = 0
+            for i in range(n):
+                if dst_fds[i] >= 0:
+                    sqe = self._sqe()
+                    L.io_uring_prep_close(sqe, dst_fds[i])
+                    sqe.user_data = i * 4 + 3
+                    expected += 1
+            # From here the ring owns the destination fds
+            closing = True
+            res = self._submit_and_reap(expected)
+            for i, (name, dst) in enumerate(jobs):
+                closed = res.get(i * 4 + 3, 0)
+                # A failed close can lose written data (e.g. NFS flush errors)
+                if closed < 0 and errors[i] is None and i not in deferred:
+                    errors[i] = OSError(-closed, os.strerror(-closed), dst)
+        except BaseException:
+            # Cancel and wait for in-flight requests before their buffers and fds
+            # are released; the ring is not reused after this
+            try:
+                self._drain()
+            except BaseException as e:
+                LOG.debug("io_uring requests could not be drained (%s)", e)
+                _abandoned.append((stats, buffers, payloads, tails, slabs, self._iovecs))
+            self.close()
+            for i, (name, dst) in enumerate(jobs):
+                if dst_fds[i] < 0:
+                    continue
+                if not closing:
+                    try:
+                        os.close(dst_fds[i])
+                    except OSError:
+                        pass
+                try:
+                    os.unlink(dst)
+                except OSError:
+                    LOG.debug("Could not remove partial file %s", dst)
+            raise
+
+        for i in deferred:
+            try:
+                fallback(start + i, sources[i], jobs[i][1])
+            except Exception as e:
+                errors[i] = e
+
+        # Don't leave empty/partial files for jobs that failed after the
+        # destination was created.
+        for i, (name, dst) in enumerate(jobs):
+            if errors[i] is not None and dst_fds[i] >= 0:
+                try:
+                    os.unlink(dst)
+                except OSError:
+                    LOG.debug("Could not remove partial file %s", dst)
+        return errors
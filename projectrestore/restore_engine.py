@@ -1,83 +1,381 @@
 # projectrestore/projectrestore/restore_engine.py
 
+import errno
+import logging
+import mmap
 import os
+import re
 import sys
 import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+from operator import itemgetter
+from typing import Tuple
+import zstandard as zstd
 from src.common import manifest, cas
+from src.common.hooks import run_hook
+from projectrestore.modules import uring
 
-def restore_snapshot(manifest_path: str, destination_path: str, hooks: dict = None) -> None:
+# Optional faster manifest codecs
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+LOG = logging.getLogger(__name__)
+
+# Progress is logged at INFO once per this many restored files (power of two)
+PROGRESS_INTERVAL = 1024
+
+# Below these sizes ring setup costs more than it saves; plain copies are used.
+URING_MIN_FILES = 8
+URING_MIN_BYTES = 64 * 1024
+
+
+def _wants_uring(pending: list) -> bool:
+    """True when the batch is large enough for io_uring to pay off (sizes come from V2 metadata)."""
+    if len(pending) < URING_MIN_FILES:
+        return False
+    sizes = [metadata.get("size") if metadata else None for *_, metadata in pending]
+    if all(isinstance(size, int) for size in sizes):
+        return sum(sizes) >= URING_MIN_BYTES
+    # V1 manifests carry no sizes; go by file count only
+    return True
+
+
+@lru_cache(maxsize=16)
+def _load_manifest_cached(abs_manifest_path: str, mtime_ns: int, size: int) -> dict:
     """
-    Restores a project snapshot from the vault to the destination path.
+    Parsed manifest keyed by (path, mtime_ns, size), so a rewritten manifest is reloaded.
+    The returned dict is shared between callers and must not be mutated.
     """
-    # Import hooks helper
-    try:
-        from src.common.hooks import run_hook
-    except ImportError:
-        sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
-        from src.common.hooks import run_hook
+    return _read_manifest(abs_manifest_path)
 
-    # --- Run Pre-Restore Hook ---
-    if hooks and "pre_restore" in hooks:
-        run_hook("pre_restore", hooks["pre_restore"])
 
-    # --- Safety Checks (Zero Trust) ---
+def _read_manifest(abs_manifest_path: str) -> dict:
+    """
+    Parses a manifest from an mmap of the file: `.msgpack` manifests with msgpack,
+    JSON with orjson when installed, otherwise the shared manifest helper.
+    """
+    is_msgpack = abs_manifest_path.endswith(".msgpack")
+    if is_msgpack and msgpack is None:
+        raise ImportError("msgpack is required to read .msgpack manifests")
+    if not is_msgpack and orjson is None:
+        return manifest.load_manifest(abs_manifest_path)
+    with open(abs_manifest_path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if is_msgpack:
+                return msgpack.unpackb(mm, raw=False)
+            with memoryview(mm) as view:
+                return orjson.loads(view)
+
+
+def _load_manifest(manifest_path: str) -> dict:
     abs_manifest_path = os.path.abspath(manifest_path)
-    abs_destination_path = os.path.abspath(destination_path)
-    vault_root = os.path.dirname(os.path.dirname(abs_manifest_path))
-    
+    st = os.stat(abs_manifest_path)
+    return _load_manifest_cached(abs_manifest_path, st.st_mtime_ns, st.st_size)
+
+
+def _create_uring_engine(objects_dir: str):
+    """Returns a UringRestoreEngine, or None if io_uring is unavailable (old kernel, no liburing)."""
+    if not uring.is_available():
+        return None
+    try:
+        return uring.UringRestoreEngine(objects_dir)
+    except Exception as e:
+        LOG.debug("io_uring unavailable (%s), using regular copy path", e)
+        return None
+
+
+_thread_state = threading.local()
+
+
+def _zstd_decompressor() -> "zstd.ZstdDecompressor":
+    """Per-thread decompression context, reused across objects (contexts are not thread-safe)."""
+    dctx = getattr(_thread_state, "dctx", None)
+    if dctx is None:
+        dctx = _thread_state.dctx = zstd.ZstdDecompressor()
+    return dctx
+
+
+# Largest zstd frame header (magic + descriptor + window + dict id + content size)
+_ZSTD_HEADER_MAX = 18
+# Read size for frames inflated without a known content size
+_INFLATE_CHUNK = 256 * 1024
+
+
+def _inflate_bounded(dctx: "zstd.ZstdDecompressor", data: bytearray) -> bytearray:
+    """Streams a frame with no recorded content size, giving up past MAX_BUFFERED_SIZE."""
+    limit = uring.MAX_BUFFERED_SIZE
+    out = bytearray()
+    reader = dctx.stream_reader(data)
+    while True:
+        chunk = reader.read(_INFLATE_CHUNK)
+        if not chunk:
+            return out
+        out += chunk
+        if len(out) > limit:
+            raise uring.PayloadTooLarge(f"Object inflates past {limit} bytes")
+
+
+def _decode_object(data: bytearray) -> bytes:
+    """
+    In-memory counterpart of cas.restore_object_to_file: inflate zstd objects, pass
+    legacy ones through. Raises uring.PayloadTooLarge for objects that inflate past
+    MAX_BUFFERED_SIZE, which have to be streamed instead.
+    """
+    if data[:4] == cas.ZSTD_MAGIC:
+        # -1 when the frame header carries no content size (streaming compressors)
+        size = zstd.frame_content_size(data)
+        if size > uring.MAX_BUFFERED_SIZE:
+            raise uring.PayloadTooLarge(f"Object inflates to {size} bytes")
+        dctx = _zstd_decompressor()
+        if size >= 0:
+            # One-shot decode into an exactly sized buffer
+            return dctx.decompress(data)
+        return _inflate_bounded(dctx, data)
+    return data
+
+def _copy_fd_range(src_fd: int, dst_fd: int, size: int) -> None:
+    """In-kernel copy of `size` bytes: copy_file_range, or sendfile where it is unsupported."""
+    offset = 0
+    if hasattr(os, "copy_file_range"):
+        try:
+            while offset < size:
+                copied = os.copy_file_range(src_fd, dst_fd, size - offset, offset, offset)
+                if copied == 0:
+                    break
+                offset += copied
+        except OSError as e:
+            # Old kernels / cross-filesystem copies; anything else is a real I/O error
+            if offset or e.errno not in (errno.ENOSYS, errno.EXDEV, errno.EINVAL, errno.EOPNOTSUPP):
+                raise
+    while offset < size:
+        sent = os.sendfile(dst_fd, src_fd, offset, size - offset)
+        if sent == 0:
+            break
+        offset += sent
+    if offset != size:
+        raise OSError(errno.EIO, f"Short copy ({offset}/{size} bytes)")
+
+
+def _open_dest(file_dest: str, mode: int) -> int:
+    return os.open(file_dest, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | os.O_CLOEXEC, mode)
+
+
+def _copy_raw_object(src_fd: int, st: os.stat_result, file_dest: str, finish=None) -> None:
+    """
+    Copies a legacy (uncompressed) object without passing bytes through user space,
+    keeping the object's mode and timestamps like shutil.copy2. `finish` then
+    overrides whichever of them the manifest records.
+    """
+    dst_fd = _open_dest(file_dest, 0o600)
     try:
-        if os.path.commonpath([vault_root, abs_destination_path]) == vault_root:
-            raise ValueError("Destination path is inside the Vault.")
-        if os.path.commonpath([vault_root, abs_destination_path]) == abs_destination_path:
-            raise ValueError("Vault path is inside the Destination path.")
-    except ValueError as e:
-        if "Vault" in str(e): raise
-        pass
+        _copy_fd_range(src_fd, dst_fd, st.st_size)
+        os.fchmod(dst_fd, st.st_mode & 0o7777)
+        os.utime(dst_fd, ns=(st.st_atime_ns, st.st_mtime_ns))
+        if finish is not None:
+            finish(dst_fd)
+    finally:
+        os.close(dst_fd)
 
-    print(f"Loading manifest from: {manifest_path}")
+
+def _inflate_object(src_fd: int, st: os.stat_result, file_dest: str, finish=None) -> None:
+    """Reads a zstd object whole and inflates it in one shot."""
+    data = bytearray(st.st_size)
+    view = memoryview(data)
+    got = 0
+    while got < st.st_size:
+        n = os.preadv(src_fd, [view[got:]], got)
+        if n == 0:
+            raise OSError(errno.EIO, f"Short read ({got}/{st.st_size} bytes)")
+        got += n
+    payload = memoryview(_decode_object(data))
+    # Same default mode (0o666 & ~umask) as the cas helper's open(..., "wb")
+    dst_fd = _open_dest(file_dest, 0o666)
     try:
-        snapshot_data = manifest.load_manifest(manifest_path)
+        while payload:
+            payload = payload[os.write(dst_fd, payload):]
+        if finish is not None:
+            finish(dst_fd)
+    finally:
+        os.close(dst_fd)
+
+
+def _stream_object(src_fd: int, file_dest: str, finish=None) -> None:
+    """Inflates a zstd object chunk by chunk, for frames that are large or of unknown size."""
+    dst_fd = _open_dest(file_dest, 0o666)
+    try:
+        with open(src_fd, "rb", closefd=False) as src, open(dst_fd, "wb", closefd=False) as dst:
+            _zstd_decompressor().copy_stream(src, dst)
+        if finish is not None:
+            finish(dst_fd)
+    finally:
+        os.close(dst_fd)
+
+
+def _copy_object(
+    object_source: str, file_dest: str, objects_fd: int = None, finish=None, object_name: str = None
+) -> None:
+    """
+    Restores one object: in-kernel copy for legacy objects, one-shot inflate for
+    compressed objects whose frame records a content size that fits in memory,
+    streaming inflate for the rest.
+    With `objects_fd`, `object_name` (the validated hash) is opened relative to
+    that directory fd.
+    `finish(fd)` runs on the written destination before it is closed; it is not
+    called for objects copied by the cas helper.
+    """
+    try:
+        if objects_fd is not None:
+            src_fd = os.open(object_name, os.O_RDONLY | os.O_CLOEXEC, dir_fd=objects_fd)
+        else:
+            src_fd = os.open(object_source, os.O_RDONLY | os.O_CLOEXEC)
+    except FileNotFoundError as e:
+        # Report the full object path whichever way it was opened
+        raise FileNotFoundError(e.errno, e.strerror, object_source) from None
+    try:
+        st = os.fstat(src_fd)
+        header = os.pread(src_fd, _ZSTD_HEADER_MAX, 0)
+        if header[:4] != cas.ZSTD_MAGIC:
+            if hasattr(os, "sendfile"):
+                return _copy_raw_object(src_fd, st, file_dest, finish)
+        else:
+            # The frame header's content size (-1 if unknown) bounds the one-shot buffer
+            size = zstd.frame_content_size(header)
+            if 0 <= size <= uring.MAX_BUFFERED_SIZE and st.st_size <= uring.MAX_BUFFERED_SIZE:
+                return _inflate_object(src_fd, st, file_dest, finish)
+            return _stream_object(src_fd, file_dest, finish)
+    finally:
+        os.close(src_fd)
+    # Use cas helper to handle compression/decompression
+    cas.restore_object_to_file(object_source, file_dest)
+
+
+def _restore_object(
+    object_source: str, file_dest: str, finish=None, object_name: str = None, objects_fd: int = None
+):
+    """_copy_object that returns the exception instead of raising."""
+    try:
+        _copy_object(object_source, file_dest, objects_fd, finish, object_name)
+        return None
     except Exception as e:
-        print(f"Failed to load manifest: {e}")
-        sys.exit(1)
+        return e
 
-    # Detect Version
-    version = snapshot_data.get("version", 1)
-    print(f"Snapshot Version: {version}")
 
-    manifest_dir = os.path.dirname(os.path.abspath(manifest_path))
-    # Try multiple locations for objects dir
-    # 1. Sibling to snapshots dir (Standard V2: vault/objects vs vault/snapshots/project)
-    objects_dir_candidate_1 = os.path.abspath(os.path.join(manifest_dir, "../../objects"))
-    # 2. Sibling to manifest file (V1 or Flat: vault/snapshots/objects - unlikely but checked before)
-    objects_dir_candidate_2 = os.path.abspath(os.path.join(manifest_dir, "../objects"))
+def _restore_objects_threaded(pending: list, objects_dir: str, finish=None) -> list:
+    """
+    Regular copy path. zstd inflate and file I/O release the GIL, so objects are
+    restored in parallel; errors come back aligned with `pending`.
+    The objects directory is opened once and objects are opened relative to it.
+    `finish(index, fd)` is passed on to _copy_object for entries with metadata.
+    """
+    if not pending:
+        return []
+    names = [file_hash for _, file_hash, _, _ in pending]
+    sources = [os.path.join(objects_dir, name) for name in names]
+    dests = [file_dest for _, _, file_dest, _ in pending]
+    finishes = [
+        partial(finish, i) if finish is not None and metadata else None
+        for i, (_, _, _, metadata) in enumerate(pending)
+    ]
+    objects_fd = None
+    if os.open in os.supports_dir_fd:
+        objects_fd = os.open(objects_dir, os.O_RDONLY | os.O_DIRECTORY | os.O_CLOEXEC)
+    try:
+        restore = partial(_restore_object, objects_fd=objects_fd)
+        if len(pending) < 2:
+            return list(map(restore, sources, dests, finishes, names))
+        with ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as executor:
+            return list(executor.map(restore, sources, dests, finishes, names))
+    finally:
+        if objects_fd is not None:
+            os.close(objects_fd)
 
-    if os.path.exists(objects_dir_candidate_1):
-        objects_dir = objects_dir_candidate_1
-    elif os.path.exists(objects_dir_candidate_2):
-        objects_dir = objects_dir_candidate_2
-    else:
-        # Fallback to standard if neither exists (will fail later but informative)
-        objects_dir = objects_dir_candidate_1
-        print(f"Error: Objects directory not found at {objects_dir} or {objects_dir_candidate_2}")
-        sys.exit(1)
 
-    print(f"Restoring to: {destination_path}")
-    os.makedirs(destination_path, exist_ok=True)
+# Absolute (POSIX or drive-letter) paths and any ".." component
+_UNSAFE_PATH_RE = re.compile(r"^(?:[\\/]|[A-Za-z]:[\\/])|(?:^|[\\/])\.\.(?:[\\/]|$)")
 
-    files = snapshot_data.get("files", {})
+
+# Object hashes are bare file names inside the objects dir
+_UNSAFE_HASH_RE = re.compile(r"[\\/]|\.\.")
+
+
+def _apply_metadata(target, metadata: dict) -> None:
+    """Applies V2 mode/mtime to a path, or to an open file descriptor (fchmod/futimens)."""
+    # Restore permissions
+    if "mode" in metadata:
+        if isinstance(target, int):
+            os.fchmod(target, metadata["mode"])
+        else:
+            os.chmod(target, metadata["mode"])
+
+    # Restore timestamps (atime, mtime)
+    if "mtime" in metadata:
+        mtime = metadata["mtime"]
+        os.utime(target, (mtime, mtime))
+
+
+def _create_parent_dirs(destination_path: str, rel_paths) -> set:
+    """
+    Creates every ancestor directory of the paths once, shallowest first.
+    A symlink found where a directory belongs (left by an earlier restore) is
+    replaced, never followed. Returns the relative parents that exist afterwards;
+    entries under any other parent are reported as failed by the caller.
+    """
+    parents = set()
+    for rel_path in rel_paths:
+        parent = os.path.dirname(rel_path)
+        while parent and parent not in parents:
+            parents.add(parent)
+            parent = os.path.dirname(parent)
+    ready = {""}
+    for parent in sorted(parents, key=lambda d: d.count(os.sep)):
+        if os.path.dirname(parent) not in ready:
+            continue
+        path = os.path.join(destination_path, parent)
+        try:
+            if os.path.islink(path):
+                os.remove(path)
+            os.makedirs(path, exist_ok=True)
+            ready.add(parent)
+        except OSError:
+            pass
+    return ready
+
+
+def _restore_files(files: dict, objects_dir: str, destination_path: str) -> Tuple[int, int]:
+    """
+    Restores every manifest entry under destination_path.
+    Returns (restored_count, skipped_count).
+    """
     restored_count = 0
     skipped_count = 0
+    # Regular files are collected here and copied in one batch after the walk
+    pending = []  # (rel_path, file_hash, file_dest, metadata)
+
+    # Zero-Trust Validation: one regex sweep over all manifest paths
+    unsafe_search = _UNSAFE_PATH_RE.search
+    unsafe_hash = _UNSAFE_HASH_RE.search
+    unsafe_paths = [rel_path for rel_path in files if unsafe_search(rel_path)]
+    for rel_path in unsafe_paths:
+        print(f"WARNING: Skipping unsafe path '{rel_path}'")
+    skipped_count += len(unsafe_paths)
+    unsafe = set(unsafe_paths)
 
+    # Every entry is validated before anything is created on disk, so a
+    # rejected entry leaves no directories behind
+    entries = []  # (rel_path, entry_type, file_hash, target, metadata)
+    add_entry = entries.append
     for rel_path, entry in files.items():
-        # Zero-Trust Validation
-        if os.path.isabs(rel_path) or ".." in os.path.normpath(rel_path).split(os.sep):
-            print(f"WARNING: Skipping unsafe path '{rel_path}'")
-            skipped_count += 1
+        if rel_path in unsafe:
             continue
 
-        file_dest = os.path.join(destination_path, rel_path)
-
         # Determine Entry Type
         entry_type = "file"
         file_hash = None
@@ -94,10 +392,51 @@ def restore_snapshot(manifest_path: str, destination_path: str, hooks: dict = No
             target = entry.get("target")
             metadata = entry
 
+        if entry_type == "file" and file_hash:
+            if unsafe_hash(file_hash):
+                print(f"WARNING: Skipping '{rel_path}': invalid object hash '{file_hash}'")
+                skipped_count += 1
+                continue
+        elif not (entry_type == "symlink" and target):
+            print(f"Unknown entry type or missing data for {rel_path}")
+            skipped_count += 1
+            continue
+        add_entry((rel_path, entry_type, file_hash, target, metadata))
+
+    # Directory tree is created once up front instead of a makedirs per file
+    ready_dirs = _create_parent_dirs(destination_path, [e[0] for e in entries])
+
+    # Path prefixes are built once; the loop concatenates instead of os.path.join
+    dst_prefix = os.path.join(destination_path, "")
+    obj_prefix = os.path.join(objects_dir, "")
+
+    # Hot-loop lookups bound to locals (global/attribute lookups per entry add up
+    # on manifests with 100k+ entries)
+    lexists = os.path.lexists
+    isdir = os.path.isdir
+    islink = os.path.islink
+    dirname = os.path.dirname
+    remove = os.remove
+    add_pending = pending.append
+    # Symlinks are created only after the data pass, so no file write can
+    # follow a link restored from the same manifest
+    links = []  # (rel_path, target, file_dest, metadata)
+    add_link = links.append
+
+    for rel_path, entry_type, file_hash, target, metadata in entries:
+        file_dest = dst_prefix + rel_path
+
         try:
+            # A file or link cannot take the place of a directory that holds
+            # other entries of this manifest
+            if rel_path in ready_dirs:
+                print(f"WARNING: Skipping '{rel_path}': path is a directory of other entries")
+                skipped_count += 1
+                continue
+
             # Remove existing file/link if present to avoid errors
-            if os.path.lexists(file_dest):
-                if os.path.isdir(file_dest) and not os.path.islink(file_dest):
+            if lexists(file_dest):
+                if isdir(file_dest) and not islink(file_dest):
                     # If it's a directory, we might need to be careful?
                     # But if we are overwriting a file with a file, we should probably remove it.
                     # For now, let's assume we can remove it.
@@ -105,63 +444,172 @@ def restore_snapshot(manifest_path: str, destination_path: str, hooks: dict = No
                     # But standard restore overwrites.
                     shutil.rmtree(file_dest)
                 else:
-                    os.remove(file_dest)
+                    remove(file_dest)
             
-            # Ensure parent dir exists
-            os.makedirs(os.path.dirname(file_dest), exist_ok=True)
-
-            if entry_type == "symlink" and target:
-                os.symlink(target, file_dest)
-                # Symlink restored
-                # Try to restore permissions if possible (lchmod is rare)
-                if metadata:
-                    # On Linux, lchmod is not available. chmod follows symlinks.
-                    # We usually don't restore permissions for symlinks themselves as they depend on umask/target.
-                    # However, lutime might be available.
-                     if "mtime" in metadata and hasattr(os, "lutime"):
-                        try:
-                            mtime = metadata["mtime"]
-                            os.lutime(file_dest, (mtime, mtime))
-                        except Exception:
-                            pass
-
-            elif entry_type == "file" and file_hash:
-                object_source = os.path.join(objects_dir, file_hash)
-
-                if not os.path.exists(object_source):
-                     print(f"ERROR: Missing object {file_hash} for file {rel_path}")
-                     skipped_count += 1
-                     continue
-
-                # Use cas helper to handle compression/decompression
-                cas.restore_object_to_file(object_source, file_dest)
-
-                # Apply Metadata (V2)
-                if metadata:
-                    try:
-                        # Restore permissions
-                        if "mode" in metadata:
-                            os.chmod(file_dest, metadata["mode"])
-                        
-                        # Restore timestamps (atime, mtime)
-                        if "mtime" in metadata:
-                            mtime = metadata["mtime"]
-                            os.utime(file_dest, (mtime, mtime))
-
-                    except Exception as e:
-                        print(f"Warning: Failed to apply metadata for {rel_path}: {e}")
+            if dirname(rel_path) not in ready_dirs:
+                raise NotADirectoryError(
+                    errno.ENOTDIR, "Parent directory could not be created", dirname(file_dest)
+                )
+
+            if entry_type == "symlink":
+                add_link((rel_path, target, file_dest, metadata))
             else:
-                 print(f"Unknown entry type or missing data for {rel_path}")
-                 skipped_count += 1
-                 continue
+                # Data copy (and metadata) is deferred to the batched pass below;
+                # a missing object surfaces there as FileNotFoundError (EAFP)
+                add_pending((rel_path, file_hash, file_dest, metadata))
 
-            print(f"Restoring: {rel_path}")
-            restored_count += 1
-            
         except Exception as e:
             print(f"Failed to restore {rel_path}: {e}")
             skipped_count += 1
 
+    # --- Batched data pass ---
+    # Objects are read in hash order (their on-disk/dirent order in the CAS),
+    # not manifest order (a walk of the source tree)
+    pending.sort(key=itemgetter(1))
+
+    # Metadata is applied on the destination fd before it is closed (no second
+    # path lookup); results are keyed by pending index. Entries the copy could
+    # not finish this way (streamed objects) fall back to path-based calls.
+    fd_metadata = {}
+
+    def finish(index: int, fd: int) -> None:
+        metadata = pending[index][3]
+        if metadata:
+            try:
+                _apply_metadata(fd, metadata)
+                fd_metadata[index] = None
+            except Exception as e:
+                fd_metadata[index] = e
+
+    def fallback(index: int, object_source: str, file_dest: str) -> None:
+        # Copies made outside the ring get their metadata from the path-based
+        # pass below, even if an aborted ring attempt already ran finish
+        fd_metadata.pop(index, None)
+        _copy_object(object_source, file_dest)
+
+    engine = _create_uring_engine(objects_dir) if _wants_uring(pending) else None
+    if engine is not None:
+        with engine:
+            errors = engine.restore_files(
+                [(file_hash, file_dest) for _, file_hash, file_dest, _ in pending],
+                decode=_decode_object,
+                fallback=fallback,
+                finish=finish,
+            )
+    else:
+        errors = _restore_objects_threaded(pending, objects_dir, finish)
+
+    # --- Deferred metadata pass ---
+    for index, ((rel_path, file_hash, file_dest, metadata), error) in enumerate(zip(pending, errors)):
+        if error is not None:
+            if isinstance(error, FileNotFoundError) and error.filename == obj_prefix + file_hash:
+                print(f"ERROR: Missing object {file_hash} for file {rel_path}")
+            else:
+                print(f"Failed to restore {rel_path}: {error}")
+            skipped_count += 1
+            continue
+
+        # Apply Metadata (V2)
+        if metadata:
+            if index in fd_metadata:
+                metadata_error = fd_metadata[index]
+            else:
+                try:
+                    _apply_metadata(file_dest, metadata)
+                    metadata_error = None
+                except Exception as e:
+                    metadata_error = e
+            if metadata_error is not None:
+                print(f"Warning: Failed to apply metadata for {rel_path}: {metadata_error}")
+
+        LOG.debug("Restoring: %s", rel_path)
+        restored_count += 1
+        if not restored_count & (PROGRESS_INTERVAL - 1):
+            LOG.info("Restored %d files...", restored_count)
+
+    # --- Symlink pass ---
+    lutime = getattr(os, "lutime", None)
+    for rel_path, target, file_dest, metadata in links:
+        try:
+            # Any existing entry was removed during the walk, so this fails
+            # rather than replace something the data pass just created
+            os.symlink(target, file_dest)
+            # On Linux, lchmod is not available and chmod follows symlinks, so
+            # only the timestamp is restored (where lutime exists)
+            if metadata and "mtime" in metadata and lutime is not None:
+                try:
+                    mtime = metadata["mtime"]
+                    lutime(file_dest, (mtime, mtime))
+                except Exception:
+                    pass
+        except Exception as e:
+            print(f"Failed to restore {rel_path}: {e}")
+            skipped_count += 1
+            continue
+
+        LOG.debug("Restoring: %s", rel_path)
+        restored_count += 1
+        if not restored_count & (PROGRESS_INTERVAL - 1):
+            LOG.info("Restored %d files...", restored_count)
+
+    return restored_count, skipped_count
+
+
+def restore_snapshot(manifest_path: str, destination_path: str, hooks: dict = None) -> None:
+    """
+    Restores a project snapshot from the vault to the destination path.
+    """
+    # --- Run Pre-Restore Hook ---
+    if hooks and "pre_restore" in hooks:
+        run_hook("pre_restore", hooks["pre_restore"])
+
+    # --- Safety Checks (Zero Trust) ---
+    abs_manifest_path = os.path.abspath(manifest_path)
+    abs_destination_path = os.path.abspath(destination_path)
+    vault_root = os.path.dirname(os.path.dirname(abs_manifest_path))
+
+    # Both paths are absolute, so containment is a prefix test on separator-terminated paths
+    vault_prefix = vault_root.rstrip(os.sep) + os.sep
+    destination_prefix = abs_destination_path.rstrip(os.sep) + os.sep
+    if destination_prefix.startswith(vault_prefix):
+        raise ValueError("Destination path is inside the Vault.")
+    if vault_prefix.startswith(destination_prefix):
+        raise ValueError("Vault path is inside the Destination path.")
+
+    print(f"Loading manifest from: {manifest_path}")
+    try:
+        snapshot_data = _load_manifest(manifest_path)
+    except Exception as e:
+        print(f"Failed to load manifest: {e}")
+        sys.exit(1)
+
+    # Detect Version
+    version = snapshot_data.get("version", 1)
+    print(f"Snapshot Version: {version}")
+
+    manifest_dir = os.path.dirname(os.path.abspath(manifest_path))
+    # Try multiple locations for objects dir
+    # 1. Sibling to snapshots dir (Standard V2: vault/objects vs vault/snapshots/project)
+    objects_dir_candidate_1 = os.path.abspath(os.path.join(manifest_dir, "../../objects"))
+    # 2. Sibling to manifest file (V1 or Flat: vault/snapshots/objects - unlikely but checked before)
+    objects_dir_candidate_2 = os.path.abspath(os.path.join(manifest_dir, "../objects"))
+
+    if os.path.exists(objects_dir_candidate_1):
+        objects_dir = objects_dir_candidate_1
+    elif os.path.exists(objects_dir_candidate_2):
+        objects_dir = objects_dir_candidate_2
+    else:
+        # Fallback to standard if neither exists (will fail later but informative)
+        objects_dir = objects_dir_candidate_1
+        print(f"Error: Objects directory not found at {objects_dir} or {objects_dir_candidate_2}")
+        sys.exit(1)
+
+    print(f"Restoring to: {destination_path}")
+    os.makedirs(destination_path, exist_ok=True)
+
+    files = snapshot_data.get("files", {})
+    restored_count, skipped_count = _restore_files(files, objects_dir, destination_path)
+
     print(f"Restore complete. Restored: {restored_count}, Skipped/Failed: {skipped_count}")
 
     # --- Run Post-Restore Hook ---
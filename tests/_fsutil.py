@@ -0,0 +1,57 @@
+# tests/_fsutil.py
+
+"""Scratch-directory helpers shared by the test modules."""
+
+import atexit
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+SHM = "/dev/shm"
+
+
+def tmpfs_mkdtemp(prefix: str) -> Optional[str]:
+    """mkdtemp on /dev/shm, or None where there is no writable tmpfs."""
+    if not (os.path.isdir(SHM) and os.access(SHM, os.W_OK)):
+        return None
+    return tempfile.mkdtemp(prefix=prefix, dir=SHM)
+
+
+def use_private_tmpfs_tempdir() -> None:
+    """
+    Point tempfile at a tmpfs directory private to this process, removed at exit,
+    for test modules run directly. Under pytest, conftest.py has already set a
+    per-worker TMPDIR, which is kept.
+    """
+    if "TMPDIR" in os.environ:
+        return
+    tmpdir = tmpfs_mkdtemp(f"pr-{os.getpid()}-")
+    if tmpdir is not None:
+        tempfile.tempdir = tmpdir
+        atexit.register(shutil.rmtree, tmpdir, True)
+
+
+def cheap_cleanup(root: Path, files) -> None:
+    """Remove a fixture dir of known shape without walking it like rmtree."""
+    try:
+        for name in files:
+            try:
+                os.unlink(root / name)
+            except FileNotFoundError:
+                pass
+        os.rmdir(root)
+    except OSError:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def fast_rmtree(path) -> None:
+    """Delete a small fixture tree bottom-up via scandir's cached entry types."""
+    with os.scandir(path) as it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                fast_rmtree(entry.path)
+            else:
+                os.unlink(entry.path)
+    os.rmdir(path)
@@ -1,55 +1,63 @@
 # tests/modules/test_checksum.py
 
-import shutil
+import os
 import tempfile
 import unittest
 from pathlib import Path
-from unittest.mock import patch
 from projectrestore.modules import checksum
+from _fsutil import cheap_cleanup
+
+
+_PAYLOAD = b"checksum test"
+_PAYLOAD_SHA256 = "50743bc89b03b938f412094255c8e3cf1658b470dbc01d7db80a11dc39adfb9a"
 
 
 class TestChecksum(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # test.bin is only ever read, so it is shared by every test
+        cls.temp_dir = Path(tempfile.mkdtemp())
+        cls.test_file = cls.temp_dir / "test.bin"
+        fd = os.open(cls.test_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            os.write(fd, _PAYLOAD)
+        finally:
+            os.close(fd)
+
+    @classmethod
+    def tearDownClass(cls):
+        cheap_cleanup(cls.temp_dir, [cls.test_file.name])
+
     def setUp(self):
-        self.temp_dir = Path(tempfile.mkdtemp())
-        self.test_file = self.temp_dir / "test.bin"
-        self.test_file.write_bytes(b"checksum test")
+        # Each test writes its own checksum file next to the shared test.bin
+        self.sum_file = self.temp_dir / f"{self._testMethodName}.sha256"
 
     def tearDown(self):
-        if self.temp_dir.exists():
-            shutil.rmtree(self.temp_dir)
+        self.sum_file.unlink(missing_ok=True)
 
     def test_compute_sha256(self):
         actual = checksum.compute_sha256(self.test_file)
-        self.assertEqual(
-            actual, "50743bc89b03b938f412094255c8e3cf1658b470dbc01d7db80a11dc39adfb9a"
-        )
+        self.assertEqual(actual, _PAYLOAD_SHA256)
 
     def test_verify_match(self):
-        sum_file = self.temp_dir / "checksum.txt"
-        sum_file.write_text(
-            "50743bc89b03b938f412094255c8e3cf1658b470dbc01d7db80a11dc39adfb9a  test.bin"
-        )
+        self.sum_file.write_text(f"{_PAYLOAD_SHA256}  test.bin")
 
-        self.assertTrue(checksum.verify_sha256_from_file(self.test_file, sum_file))
+        self.assertTrue(checksum.verify_sha256_from_file(self.test_file, self.sum_file))
 
     def test_verify_mismatch(self):
-        sum_file = self.temp_dir / "checksum.txt"
-        sum_file.write_text(
+        self.sum_file.write_text(
             "deadbeefdeadbeefdeadbeefdeadbeefdeadbeefdeadbeefdeadbeefdeadbeef"
         )
 
-        self.assertFalse(checksum.verify_sha256_from_file(self.test_file, sum_file))
+        self.assertFalse(checksum.verify_sha256_from_file(self.test_file, self.sum_file))
 
     def test_empty_checksum_file(self):
-        sum_file = self.temp_dir / "checksum.txt"
-        sum_file.touch()
+        self.sum_file.touch()
 
-        self.assertFalse(checksum.verify_sha256_from_file(self.test_file, sum_file))
+        self.assertFalse(checksum.verify_sha256_from_file(self.test_file, self.sum_file))
 
     def test_checksum_read_exception(self):
-        with patch("builtins.open", side_effect=OSError("read fail")):
-            self.assertFalse(
-                checksum.verify_sha256_from_file(
-                    self.test_file, self.temp_dir / "missing.txt"
-                )
-            )
+        # The real OSError from reading a missing checksum file is enough
+        self.assertFalse(
+            checksum.verify_sha256_from_file(self.test_file, self.sum_file)
+        )
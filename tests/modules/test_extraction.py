@@ -7,48 +7,55 @@ import shutil
 import tempfile
 import time
 import stat
+from types import SimpleNamespace
 from pathlib import Path
 import unittest
 from unittest import mock
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch
 from projectrestore.modules import extraction
+from _fsutil import cheap_cleanup
+
+
+_FIXED_MTIME = 1_700_000_000
+_FROZEN_TS = 1234567890
+
+
+def _make_member(
+    name, *, type=tarfile.REGTYPE, size=0, mode=0o644, mtime=_FIXED_MTIME, linkname=""
+):
+    """Return a TarInfo with the fields the fixture archives care about."""
+    member = tarfile.TarInfo(name)
+    member.type = type
+    member.size = size
+    member.mode = mode
+    member.mtime = mtime
+    member.linkname = linkname
+    return member
 
 
 class TestSanitizeMemberName(unittest.TestCase):
-    def test_safe_paths(self):
-        safe_cases = [
-            ("foo/bar.txt", "foo/bar.txt"),
-            ("./foo", "foo"),
-            ("dir/../safe", "safe"),  # normpath collapses but doesn't start with ..
-            ("dir/", "dir"),
-            (".", ""),  # . -> ""
-        ]
-        for input_name, expected in safe_cases:
-            with self.subTest(input_name=input_name):
-                result = extraction._sanitize_member_name(input_name)
-                self.assertEqual(result, expected)
-
-    def test_unsafe_paths(self):
-        unsafe_cases = [
-            ("../traversal", None),
-            ("..", None),
-            ("../../etc/passwd", None),
-        ]
-        for input_name, _ in unsafe_cases:
-            with self.subTest(input_name=input_name):
-                result = extraction._sanitize_member_name(input_name)
-                self.assertIsNone(result)
-
-    def test_absolute_paths(self):
-        abs_cases = [
-            ("/absolute", "absolute"),  # Current impl strips but doesn't reject
-            ("/../foo", None),
-            ("", None),  # empty -> None
-        ]
-        for input_name, expected in abs_cases:
-            with self.subTest(input_name=input_name):
-                result = extraction._sanitize_member_name(input_name)
-                self.assertEqual(result, expected)
+    CASES = [
+        # Safe
+        ("foo/bar.txt", "foo/bar.txt"),
+        ("./foo", "foo"),
+        ("dir/../safe", "safe"),  # normpath collapses but doesn't start with ..
+        ("dir/", "dir"),
+        (".", ""),  # . -> ""
+        # Unsafe
+        ("../traversal", None),
+        ("..", None),
+        ("../../etc/passwd", None),
+        # Absolute / empty
+        ("/absolute", "absolute"),  # Current impl strips but doesn't reject
+        ("/../foo", None),
+        ("", None),  # empty -> None
+    ]
+
+    def test_sanitize_member_name(self):
+        sanitize = extraction._sanitize_member_name
+        for input_name, expected in self.CASES:
+            with self.subTest(input_name=input_name, expected=expected):
+                self.assertEqual(sanitize(input_name), expected)
 
 
 class TestMemberTypeChecks(unittest.TestCase):
@@ -89,8 +96,7 @@ class TestWriteFileobjToPath(unittest.TestCase):
         self.mtime = int(time.time())
 
     def tearDown(self):
-        if self.temp_dir.exists():
-            shutil.rmtree(self.temp_dir)
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
 
     def test_write_and_rename(self):
         extraction._write_fileobj_to_path(
@@ -128,27 +134,27 @@ class TestWriteFileobjToPath(unittest.TestCase):
     @patch.object(Path, "mkdir")
     def test_parent_mkdir_fail(self, mock_mkdir):
         mock_mkdir.side_effect = OSError("mkdir fail")
-        with self.assertRaises(OSError) as cm:
+        with self.assertRaisesRegex(OSError, "^mkdir fail$"):
             extraction._write_fileobj_to_path(self.fileobj, self.dest, self.mode, None)
-        self.assertEqual(str(cm.exception), "mkdir fail")
 
 
 class TestRemoveDangerousBits(unittest.TestCase):
     def setUp(self):
         self.temp_dir = Path(tempfile.mkdtemp())
         self.test_file = self.temp_dir / "testfile"
-        self.test_file.write_text("content")
-        # Set dangerous bits
-        os.chmod(
-            self.test_file,
-            stat.S_IMODE(
-                stat.S_IRUSR | stat.S_IWUSR | stat.S_IXUSR | stat.S_ISUID | stat.S_ISGID
-            ),
-        )
+        # Write the file and set dangerous bits through a single fd
+        fd = os.open(self.test_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        try:
+            os.write(fd, b"content")
+            os.fchmod(
+                fd,
+                stat.S_IRUSR | stat.S_IWUSR | stat.S_IXUSR | stat.S_ISUID | stat.S_ISGID,
+            )
+        finally:
+            os.close(fd)
 
     def tearDown(self):
-        if self.temp_dir.exists():
-            shutil.rmtree(self.temp_dir)
+        cheap_cleanup(self.temp_dir, ["testfile"])
 
     def test_remove_bits(self):
         extraction._remove_dangerous_bits(self.test_file)
@@ -157,7 +163,7 @@ class TestRemoveDangerousBits(unittest.TestCase):
 
     @patch("pathlib.Path.stat", side_effect=OSError("stat fail"))
     def test_stat_fail(self, mock_stat):
-        path = Path(tempfile.mktemp())
+        path = self.temp_dir / "does-not-exist"
         with patch.object(extraction.LOG, "debug") as mock_log:
             extraction._remove_dangerous_bits(path)
         mock_log.assert_called_once_with(
@@ -166,52 +172,67 @@ class TestRemoveDangerousBits(unittest.TestCase):
 
 
 class TestSafeExtractAtomic(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # Most tests only need the default archive; build it once
+        cls._DEFAULT_TAR_BYTES = cls._build_sample_tar()
+        # Freeze the clock extraction uses for .new_/.old_ names once per class
+        cls._clock = patch.object(
+            extraction, "time", SimpleNamespace(time=lambda: _FROZEN_TS)
+        )
+        cls._clock.start()
+        # Class cleanups also run when the rest of setUpClass raises
+        cls.addClassCleanup(cls._clock.stop)
+        # Extract the default archive once; tests that only inspect the result
+        # of a plain extraction read it from here
+        cls._golden_dir = Path(tempfile.mkdtemp()) / "golden"
+        cls.addClassCleanup(shutil.rmtree, cls._golden_dir.parent, ignore_errors=True)
+        extraction.safe_extract_atomic(
+            io.BytesIO(cls._DEFAULT_TAR_BYTES), cls._golden_dir
+        )
+
     def setUp(self):
         self.temp_dir = Path(tempfile.mkdtemp())
-        self.tar_path = self.temp_dir / "test.tar.gz"
+        self.tar_path = self.temp_dir / "test.tar"
         self.dest_dir = self.temp_dir / "extract_here"
-        self.mtime = int(time.time())
-        self._create_sample_tar()
+        # In-memory archive; only tests of path handling write tar_path
+        self.archive = io.BytesIO(self._DEFAULT_TAR_BYTES)
 
     def tearDown(self):
-        if self.temp_dir.exists():
-            shutil.rmtree(self.temp_dir)
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
 
-    def _create_sample_tar(self, extra_members=None):
-        """Create a simple tar.gz with a dir and file."""
-        extra_members = extra_members or []
+    @staticmethod
+    def _build_sample_tar():
+        """Return the bytes of a plain tar with a dir and a file."""
         tar_buffer = io.BytesIO()
-        with tarfile.open(fileobj=tar_buffer, mode="w:gz") as tar:
+        with tarfile.open(fileobj=tar_buffer, mode="w") as tar:
             # Dir
-            dir_info = tarfile.TarInfo("mydir/")
-            dir_info.type = tarfile.DIRTYPE
-            dir_info.mode = 0o755
-            dir_info.mtime = self.mtime
-            tar.addfile(dir_info)
+            tar.addfile(_make_member("mydir/", type=tarfile.DIRTYPE, mode=0o755))
 
             # File
             content = b"Hello, safe extract!"
-            file_info = tarfile.TarInfo("mydir/file.txt")
-            file_info.size = len(content)
-            file_info.mode = 0o644
-            file_info.mtime = self.mtime
-            file_info.type = tarfile.REGTYPE
+            file_info = _make_member("mydir/file.txt", size=len(content))
             tar.addfile(file_info, io.BytesIO(content))
+        return tar_buffer.getvalue()
 
-            # Extra members
-            for member_info, member_content in extra_members:
-                fobj = (
-                    io.BytesIO(member_content) if member_content is not None else None
-                )
-                tar.addfile(member_info, fobj)
-
-        with open(self.tar_path, "wb") as f:
-            f.write(tar_buffer.getvalue())
+    def _create_sample_tar(self, extra_members=None):
+        """Return the sample archive (plus any extra members) as a fileobj."""
+        tar_buffer = io.BytesIO(self._DEFAULT_TAR_BYTES)
+        if extra_members:
+            # Append to a copy of the prebuilt archive rather than rebuilding it
+            with tarfile.open(fileobj=tar_buffer, mode="a") as tar:
+                for member_info, member_content in extra_members:
+                    fobj = (
+                        io.BytesIO(member_content)
+                        if member_content is not None
+                        else None
+                    )
+                    tar.addfile(member_info, fobj)
+            tar_buffer.seek(0)
+        return tar_buffer
 
     def test_basic_extract(self):
-        extraction.safe_extract_atomic(self.tar_path, self.dest_dir, dry_run=False)
-
-        extracted_dir = self.dest_dir / "mydir"
+        extracted_dir = self._golden_dir / "mydir"
         self.assertTrue(extracted_dir.exists())
         self.assertTrue((extracted_dir / "file.txt").exists())
         self.assertEqual(
@@ -221,12 +242,20 @@ class TestSafeExtractAtomic(unittest.TestCase):
         file_stat = (extracted_dir / "file.txt").stat()
         self.assertEqual(file_stat.st_mode & (stat.S_ISUID | stat.S_ISGID), 0)
 
+    def test_extract_from_path(self):
+        self.tar_path.write_bytes(self._DEFAULT_TAR_BYTES)
+        extraction.safe_extract_atomic(self.tar_path, self.dest_dir)
+        self.assertEqual(
+            (self.dest_dir / "mydir" / "file.txt").read_bytes(),
+            (self._golden_dir / "mydir" / "file.txt").read_bytes(),
+        )
+
     def test_dry_run(self):
         with patch.object(extraction.LOG, "info") as mock_log:
-            extraction.safe_extract_atomic(self.tar_path, self.dest_dir, dry_run=True)
+            extraction.safe_extract_atomic(self.archive, self.dest_dir, dry_run=True)
 
-        self.assertFalse(self.dest_dir.exists())  # No extraction
-        mock_log.assert_called_with("Dry-run: validating archive %s", self.tar_path)
+        self.assertEqual(os.listdir(self.temp_dir), [])  # Dry run adds nothing
+        mock_log.assert_called_with("Dry-run: validating archive %s", self.archive)
 
     def test_dry_run_cleanup_fail(self):
         fail_count = [0]
@@ -240,150 +269,116 @@ class TestSafeExtractAtomic(unittest.TestCase):
         with patch("shutil.rmtree", side_effect=rmtree_side_effect), patch.object(
             extraction.LOG, "debug"
         ) as mock_log:
-            extraction.safe_extract_atomic(self.tar_path, self.dest_dir, dry_run=True)
+            extraction.safe_extract_atomic(self.archive, self.dest_dir, dry_run=True)
 
-        self.assertFalse(self.dest_dir.exists())  # No extraction
+        # The failed cleanup may leave the .new_ tempdir, but never dest_dir
+        self.assertNotIn(self.dest_dir.name, os.listdir(self.temp_dir))
         mock_log.assert_any_call("Failed to cleanup dry-run tempdir %s", mock.ANY)
         mock_log.assert_any_call("Failed to cleanup tmpdir %s", mock.ANY)
 
     def test_nonexistent_archive(self):
-        bad_tar = self.tar_path.with_name("bad.tar.gz")
-        with self.assertRaises(FileNotFoundError) as cm:
+        bad_tar = self.tar_path.with_name("bad.tar")
+        with self.assertRaisesRegex(FileNotFoundError, "Archive not found"):
             extraction.safe_extract_atomic(bad_tar, self.dest_dir)
-        self.assertIn("Archive not found", str(cm.exception))
 
-    @patch("time.time", return_value=1234567890)
     @patch("os.getpid", return_value=999)
-    def test_temp_dir_exists(self, mock_getpid, mock_time):
-        ts = 1234567890
+    def test_temp_dir_exists(self, mock_getpid):
+        ts = _FROZEN_TS
         new_dir = self.dest_dir.parent / f"{self.dest_dir.name}.new_999_{ts}"
         new_dir.mkdir(mode=0o700)
+        self.tar_path.write_bytes(self._DEFAULT_TAR_BYTES)
 
         with self.assertRaises(RuntimeError) as cm:
             extraction.safe_extract_atomic(self.tar_path, self.dest_dir)
         self.assertIn("Temp extraction dir unexpectedly exists", str(cm.exception))
         self.assertIn(str(new_dir), str(cm.exception))
 
-    def test_max_files_limit(self):
-        # Tar with 2 files
-        extra_info = tarfile.TarInfo("extra.txt")
-        extra_content = b"extra"
-        extra_info.size = len(extra_content)
-        extra_info.mode = 0o644
-        extra_info.mtime = self.mtime
-        extra_info.type = tarfile.REGTYPE
-        self._create_sample_tar(extra_members=[(extra_info, extra_content)])
-
-        with self.assertRaises(RuntimeError) as cm:
-            extraction.safe_extract_atomic(self.tar_path, self.dest_dir, max_files=1)
-        self.assertEqual(str(cm.exception), "Archive exceeds max-files limit")
-
-    def test_max_bytes_limit(self):
+    def test_rejects_dangerous_members(self):
         large_content = b"A" * 1025  # >1024, hello ~20
-        extra_info = tarfile.TarInfo("large.txt")
-        extra_info.size = len(large_content)
-        extra_info.mode = 0o644
-        extra_info.mtime = self.mtime
-        extra_info.type = tarfile.REGTYPE
-        self._create_sample_tar(extra_members=[(extra_info, large_content)])
-
-        with self.assertRaises(RuntimeError) as cm:
-            extraction.safe_extract_atomic(self.tar_path, self.dest_dir, max_bytes=1024)
-        self.assertEqual(str(cm.exception), "Archive exceeds max-bytes limit")
-
-    def test_reject_unsafe_path(self):
-        # Current impl doesn't reject stripped absolute, so test traversal instead
-        traversal_info = tarfile.TarInfo("../etc/passwd")
-        traversal_content = b"malicious"
-        traversal_info.size = len(traversal_content)
-        traversal_info.mode = 0o644
-        traversal_info.mtime = self.mtime
-        traversal_info.type = tarfile.REGTYPE
-        self._create_sample_tar(extra_members=[(traversal_info, traversal_content)])
-
-        with self.assertRaises(RuntimeError) as cm:
-            extraction.safe_extract_atomic(self.tar_path, self.dest_dir)
-        self.assertIn("Tar member has unsafe path", str(cm.exception))
-
-    def test_reject_symlink(self):
-        link_member = tarfile.TarInfo("symlink")
-        link_member.type = tarfile.SYMTYPE
-        link_member.linkname = "/etc/passwd"
-        link_member.size = 0
-        self._create_sample_tar(extra_members=[(link_member, None)])
-
-        with self.assertRaises(RuntimeError) as cm:
-            extraction.safe_extract_atomic(self.tar_path, self.dest_dir)
-        self.assertIn("Tar contains symlink/hardlink member", str(cm.exception))
-
-    def test_reject_special_device(self):
-        dev_member = tarfile.TarInfo("device")
-        dev_member.type = tarfile.CHRTYPE
-        dev_member.size = 0
-        self._create_sample_tar(extra_members=[(dev_member, None)])
-
-        with self.assertRaises(RuntimeError) as cm:
-            extraction.safe_extract_atomic(self.tar_path, self.dest_dir)
-        self.assertIn("Tar contains special device/fifo member", str(cm.exception))
-
-    def test_reject_sparse(self):
-        sparse_member = tarfile.TarInfo("sparse")
-        sparse_member.type = tarfile.GNUTYPE_SPARSE
-        sparse_member.size = 0
-        self._create_sample_tar(extra_members=[(sparse_member, None)])
-
-        with self.assertRaises(RuntimeError) as cm:
-            extraction.safe_extract_atomic(self.tar_path, self.dest_dir)
-        self.assertIn("Rejecting sparse/gnu-special member", str(cm.exception))
-
-    @patch("tarfile.open")
-    def test_allow_sparse(self, mock_open):
-        mock_tf = MagicMock()
-        sparse_member = MagicMock()
-        sparse_member.name = "sparse"
-        sparse_member.type = tarfile.GNUTYPE_SPARSE
-        sparse_member.isdir.return_value = False
-        sparse_member.isreg.return_value = False
-        sparse_member.issym.return_value = False
-        sparse_member.islnk.return_value = False
-        sparse_member.size = 0
-        mock_tf.__iter__.return_value = iter([sparse_member])
-        mock_open.return_value.__enter__.return_value = mock_tf
-
-        with self.assertRaises(RuntimeError) as cm:
-            extraction.safe_extract_atomic(
-                self.tar_path, self.dest_dir, reject_sparse=False
-            )
-        self.assertIn("Unsupported or disallowed tar member type", str(cm.exception))
+        cases = [
+            # (case, member, content, kwargs, expected message)
+            (
+                "max_files",
+                _make_member("extra.txt", size=5),
+                b"extra",
+                {"max_files": 1},
+                "^Archive exceeds max-files limit$",
+            ),
+            (
+                "max_bytes",
+                _make_member("large.txt", size=len(large_content)),
+                large_content,
+                {"max_bytes": 1024},
+                "^Archive exceeds max-bytes limit$",
+            ),
+            # Current impl doesn't reject stripped absolute, so test traversal instead
+            (
+                "unsafe_path",
+                _make_member("../etc/passwd", size=9),
+                b"malicious",
+                {},
+                "Tar member has unsafe path",
+            ),
+            (
+                "symlink",
+                _make_member("symlink", type=tarfile.SYMTYPE, linkname="/etc/passwd"),
+                None,
+                {},
+                "Tar contains symlink/hardlink member",
+            ),
+            (
+                "special_device",
+                _make_member("device", type=tarfile.CHRTYPE),
+                None,
+                {},
+                "Tar contains special device/fifo member",
+            ),
+            (
+                "sparse",
+                _make_member("sparse", type=tarfile.GNUTYPE_SPARSE),
+                None,
+                {},
+                "Rejecting sparse/gnu-special member",
+            ),
+            (
+                "unknown_type",
+                _make_member("unknown", type=b"?"),
+                None,
+                {},
+                "Unsupported or disallowed tar member type",
+            ),
+        ]
+        for case, member, content, kwargs, message in cases:
+            with self.subTest(case=case):
+                archive = self._create_sample_tar(extra_members=[(member, content)])
+                with self.assertRaisesRegex(RuntimeError, message):
+                    extraction.safe_extract_atomic(
+                        archive, self.temp_dir / case, **kwargs
+                    )
+
+    def test_allow_sparse(self):
+        # With rejection off, tarfile treats a sparse member as a regular file
+        sparse_member = _make_member("sparse", type=tarfile.GNUTYPE_SPARSE)
+        self.archive = self._create_sample_tar(extra_members=[(sparse_member, None)])
+
+        extraction.safe_extract_atomic(self.archive, self.dest_dir, reject_sparse=False)
+        self.assertEqual((self.dest_dir / "sparse").read_bytes(), b"")
 
     def test_skip_pax_headers(self):
-        pax_member = tarfile.TarInfo("paxheader")
-        pax_member.type = tarfile.XHDTYPE
-        pax_member.size = 7
-        pax_member.name = "./paxheader"
-        self._create_sample_tar(extra_members=[(pax_member, b"path=foo")])
+        pax_member = _make_member("./paxheader", type=tarfile.XHDTYPE, size=7)
+        self.archive = self._create_sample_tar(extra_members=[(pax_member, b"path=foo")])
 
         # No exception, skips (not yielded by tarfile)
-        extraction.safe_extract_atomic(self.tar_path, self.dest_dir)
+        extraction.safe_extract_atomic(self.archive, self.dest_dir)
         self.assertTrue((self.dest_dir / "mydir" / "file.txt").exists())
 
-    def test_unknown_member_type(self):
-        unknown_member = tarfile.TarInfo("unknown")
-        unknown_member.type = b"?"
-        unknown_member.size = 0
-        self._create_sample_tar(extra_members=[(unknown_member, None)])
-
-        with self.assertRaises(RuntimeError) as cm:
-            extraction.safe_extract_atomic(self.tar_path, self.dest_dir)
-        self.assertIn("Unsupported or disallowed tar member type", str(cm.exception))
-
     @patch("shutil.rmtree")
     def test_atomic_swap_with_existing_dir(self, mock_rmtree):
         # Pre-create dest_dir with a file
         self.dest_dir.mkdir()
         (self.dest_dir / "existing.txt").write_text("old")
 
-        extraction.safe_extract_atomic(self.tar_path, self.dest_dir)
+        extraction.safe_extract_atomic(self.archive, self.dest_dir)
 
         # Old should be backed up
         old_backup = None
@@ -400,8 +395,7 @@ class TestSafeExtractAtomic(unittest.TestCase):
         # rmtree called on backup
         mock_rmtree.assert_called_once()
 
-    @patch("time.time", return_value=1234567890)
-    def test_atomic_swap_rollback(self, mock_time):
+    def test_atomic_swap_rollback(self):
         original_replace = Path.replace
 
         def replace_side_effect(src, dst):
@@ -417,19 +411,17 @@ class TestSafeExtractAtomic(unittest.TestCase):
             self.dest_dir.mkdir()
             (self.dest_dir / "existing.txt").write_text("old")
 
-            with self.assertRaises(OSError) as cm:
-                extraction.safe_extract_atomic(self.tar_path, self.dest_dir)
-            self.assertIn("swap fail", str(cm.exception))
+            with self.assertRaisesRegex(OSError, "swap fail"):
+                extraction.safe_extract_atomic(self.archive, self.dest_dir)
 
             # Rollback: dest_dir restored
             self.assertTrue((self.dest_dir / "existing.txt").exists())
 
-    @patch("time.time", return_value=1234567890)
     @patch("projectrestore.modules.extraction.LOG")
-    def test_rollback_fail(self, mock_log, mock_time):
+    def test_rollback_fail(self, mock_log):
         original_replace = Path.replace
 
-        ts = 1234567890
+        ts = _FROZEN_TS
         pid = os.getpid()
         backup_dir = self.dest_dir.parent / f"{self.dest_dir.name}.old_{pid}_{ts}"
 
@@ -446,9 +438,8 @@ class TestSafeExtractAtomic(unittest.TestCase):
             self.dest_dir.mkdir()
             (self.dest_dir / "existing.txt").write_text("old")
 
-            with self.assertRaises(OSError) as cm:
-                extraction.safe_extract_atomic(self.tar_path, self.dest_dir)
-            self.assertIn("swap fail", str(cm.exception))
+            with self.assertRaisesRegex(OSError, "swap fail"):
+                extraction.safe_extract_atomic(self.archive, self.dest_dir)
             mock_log.exception.assert_called_once_with(
                 "Failed during swap/rename: %s", mock.ANY
             )
@@ -461,7 +452,7 @@ class TestSafeExtractAtomic(unittest.TestCase):
     def test_backup_rmtree_fail(self, mock_rmtree):
         self.dest_dir.mkdir()
         with patch("projectrestore.modules.extraction.LOG.warning") as mock_log:
-            extraction.safe_extract_atomic(self.tar_path, self.dest_dir)
+            extraction.safe_extract_atomic(self.archive, self.dest_dir)
         mock_rmtree.assert_called_once()
         mock_log.assert_called_with(
             "Failed to remove backup directory %s (non-fatal)", mock.ANY
@@ -469,14 +460,10 @@ class TestSafeExtractAtomic(unittest.TestCase):
 
     def test_touch_for_none_fileobj(self):
         # Create tar with reg size=0
-        zero_file_info = tarfile.TarInfo("zero.txt")
-        zero_file_info.size = 0
-        zero_file_info.mode = 0o644
-        zero_file_info.mtime = self.mtime
-        zero_file_info.type = tarfile.REGTYPE
-        self._create_sample_tar(extra_members=[(zero_file_info, None)])
+        zero_file_info = _make_member("zero.txt")
+        self.archive = self._create_sample_tar(extra_members=[(zero_file_info, None)])
 
-        extraction.safe_extract_atomic(self.tar_path, self.dest_dir)
+        extraction.safe_extract_atomic(self.archive, self.dest_dir)
         zero_file = self.dest_dir / "zero.txt"
         self.assertTrue(zero_file.exists())
         self.assertEqual(zero_file.read_bytes(), b"")
@@ -484,34 +471,32 @@ class TestSafeExtractAtomic(unittest.TestCase):
     @patch.object(tarfile.TarFile, "extractfile", return_value=None)
     def test_touch_for_none_extractfile(self, mock_extractfile):
         # Force f=None for reg member
-        extraction.safe_extract_atomic(self.tar_path, self.dest_dir)
+        extraction.safe_extract_atomic(self.archive, self.dest_dir)
         mock_extractfile.assert_called()
         self.assertTrue((self.dest_dir / "mydir" / "file.txt").exists())
 
-    # To cover allow_pax skip branch (not naturally hit)
-    @patch("tarfile.open")
+    # To cover allow_pax skip branch: tarfile consumes pax headers itself and
+    # never yields them, so the real TarFile's iterator yields real header members
     @patch.object(extraction, "LOG")
-    def test_skip_pax_with_mock(self, mock_log, mock_open):
-        mock_tf = MagicMock()
-        pax_member = MagicMock()
-        pax_member.name = "pax"
-        pax_member.type = tarfile.XHDTYPE
-        reg_member = MagicMock()
-        reg_member.name = "file.txt"
-        reg_member.isdir.return_value = False
-        reg_member.isreg.return_value = True
-        reg_member.issym.return_value = False
-        reg_member.islnk.return_value = False
-        reg_member.type = tarfile.REGTYPE
-        reg_member.size = 10
-        mock_tf.extractfile.return_value = io.BytesIO(b"")
-        mock_tf.__iter__.return_value = iter([pax_member, reg_member])
-        mock_open.return_value.__enter__.return_value = mock_tf
-
-        extraction.safe_extract_atomic(
-            self.tar_path, self.dest_dir, allow_pax=True, dry_run=True
-        )
+    def test_skip_pax_with_mock(self, mock_log):
+        members = [
+            _make_member("pax", type=tarfile.XHDTYPE),
+            _make_member("global", type=tarfile.XGLTYPE),
+            _make_member("file.txt"),
+        ]
+        with patch.object(tarfile.TarFile, "__iter__", lambda tf: iter(members)):
+            extraction.safe_extract_atomic(
+                self.archive, self.dest_dir, allow_pax=True, dry_run=True
+            )
 
-        mock_log.debug.assert_called_once_with(
-            "Skipping pax/global header member: %s (type=%s)", "pax", tarfile.XHDTYPE
+        self.assertEqual(
+            mock_log.debug.call_args_list,
+            [
+                mock.call(
+                    "Skipping pax/global header member: %s (type=%s)", "pax", tarfile.XHDTYPE
+                ),
+                mock.call(
+                    "Skipping pax/global header member: %s (type=%s)", "global", tarfile.XGLTYPE
+                ),
+            ],
         )
@@ -1,34 +1,66 @@
 # tests/modules/test_locking.py
 
 import os
+import signal
 import stat
-import time
 import unittest
 from pathlib import Path
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch
 import tempfile
-import shutil
 import sys
 
 # Fix import path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 
 from projectrestore.modules import locking
+from _fsutil import cheap_cleanup
+
+
+_NOW = 10000.0
+
+
+# Stand-in for Path.stat() on a lockfile last touched 1000s before _NOW
+_RECENT_LOCK_STAT = os.stat_result(
+    (stat.S_IFREG | 0o644, 0, 0, 1, 0, 0, 0, _NOW - 1000, _NOW - 1000, _NOW - 1000)
+)
+
+
+def _now():
+    return _NOW
+
+
+def _dead(pid):
+    return False
 
 
 class TestLocking(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # Save the runner's handlers (pytest installs its own) instead of
+        # clobbering them with SIG_DFL afterwards
+        cls._old_handlers = {
+            sig: signal.getsignal(sig) for sig in (signal.SIGINT, signal.SIGTERM)
+        }
+
+    @classmethod
+    def tearDownClass(cls):
+        # Locking installs no handlers itself, so one check per class is enough
+        for sig, handler in cls._old_handlers.items():
+            if signal.getsignal(sig) is not handler:
+                signal.signal(sig, handler)
+
     def setUp(self):
         self.temp_dir = Path(tempfile.mkdtemp())
         self.lockfile = self.temp_dir / "test.pid"
 
     def tearDown(self):
-        if self.temp_dir.exists():
-            shutil.rmtree(self.temp_dir)
-        # Reset signal handlers if needed
-        import signal
+        cheap_cleanup(self.temp_dir, [self.lockfile.name])
 
-        signal.signal(signal.SIGINT, signal.SIG_DFL)
-        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    def _write_lock(self, content, age):
+        # Lockfile whose mtime is `age` seconds before the fake clock
+        self.lockfile.write_text(content)
+        mtime = _NOW - age
+        os.utime(self.lockfile, (mtime, mtime))
 
     def test_create_release_lock(self):
         locking.create_pid_lock(self.lockfile)
@@ -39,30 +71,20 @@ class TestLocking(unittest.TestCase):
         locking.release_pid_lock(self.lockfile)
         self.assertFalse(self.lockfile.exists())
 
-    @patch("projectrestore.modules.locking._is_process_alive")
-    @patch("time.time")
-    def test_stale_lock(self, mock_time, mock_alive):
-        mock_alive.return_value = False
-        current_time = 10000.0
-        mock_time.return_value = current_time
-        
-        stale_pid = 12345
-        self.lockfile.write_text(str(stale_pid))
-        
-        old_mtime = current_time - 4000
-        os.utime(self.lockfile, (old_mtime, old_mtime))
-
-        locking.create_pid_lock(self.lockfile, stale_seconds=3600)
+    def test_stale_lock(self):
+        self._write_lock("12345", age=4000)
+
+        locking.create_pid_lock(
+            self.lockfile, stale_seconds=3600, clock=_now, is_alive=_dead
+        )
         self.assertTrue(self.lockfile.exists())
         self.assertEqual(self.lockfile.read_text().strip(), str(os.getpid()))
 
-    @patch("projectrestore.modules.locking._is_process_alive")
-    def test_running_instance(self, mock_alive):
-        mock_alive.return_value = True
+    def test_running_instance(self):
         self.lockfile.write_text("99999")
 
         with self.assertRaises(SystemExit) as cm:
-            locking.create_pid_lock(self.lockfile)
+            locking.create_pid_lock(self.lockfile, is_alive=lambda pid: True)
         self.assertEqual(cm.exception.code, 3)
 
     def test_release_not_owned(self):
@@ -70,74 +92,53 @@ class TestLocking(unittest.TestCase):
         locking.release_pid_lock(self.lockfile)
         self.assertTrue(self.lockfile.exists())
 
-    @patch("projectrestore.modules.locking._is_process_alive")
-    @patch("time.time")
     @patch("pathlib.Path.unlink", side_effect=OSError("unlink fail"))
-    def test_stale_remove_fail(self, mock_unlink, mock_time, mock_alive):
-        mock_alive.return_value = False
-        current_time = 10000.0
-        mock_time.return_value = current_time
-        
-        self.lockfile.write_text("12345")
-        old_mtime = current_time - 4000
-        os.utime(self.lockfile, (old_mtime, old_mtime))
+    def test_stale_remove_fail(self, mock_unlink):
+        self._write_lock("12345", age=4000)
 
         with self.assertRaises(SystemExit) as cm:
-            locking.create_pid_lock(self.lockfile, stale_seconds=3600)
+            locking.create_pid_lock(
+                self.lockfile, stale_seconds=3600, clock=_now, is_alive=_dead
+            )
         self.assertEqual(cm.exception.code, 3)
         mock_unlink.assert_called_once()
 
-    @patch("projectrestore.modules.locking._is_process_alive")
-    @patch("time.time")
-    def test_stale_not_old_enough(self, mock_time, mock_alive):
-        mock_alive.return_value = False
-        current_time = 10000.0
-        mock_time.return_value = current_time
-        
-        self.lockfile.write_text("12345")
-        old_mtime = current_time - 3000
-        os.utime(self.lockfile, (old_mtime, old_mtime))
+    def test_stale_not_old_enough(self):
+        self._write_lock("12345", age=3000)
 
         with self.assertRaises(SystemExit) as cm:
-            locking.create_pid_lock(self.lockfile, stale_seconds=3600)
+            locking.create_pid_lock(
+                self.lockfile, stale_seconds=3600, clock=_now, is_alive=_dead
+            )
         self.assertEqual(cm.exception.code, 3)
 
-    @patch("time.time")
     @patch("pathlib.Path.unlink", return_value=None)
-    def test_unreadable_stale_remove(self, mock_unlink, mock_time):
-        current_time = 10000.0
-        mock_time.return_value = current_time
-        
-        self.lockfile.write_text("garbage")
-        old_mtime = current_time - 4000
-        os.utime(self.lockfile, (old_mtime, old_mtime))
+    def test_unreadable_stale_remove(self, mock_unlink):
+        self._write_lock("garbage", age=4000)
 
         original_open = os.open
+        lock_str = str(self.lockfile)
         def side_effect_open(path, flags, *args):
-            if str(path) == str(self.lockfile) and (flags & os.O_EXCL):
+            if path == lock_str and (flags & os.O_EXCL):
                 raise FileExistsError
             return original_open(path, flags, *args)
 
         with patch("os.open", side_effect=side_effect_open):
             with patch.object(locking.LOG, "error") as mock_log:
                 with self.assertRaises(SystemExit) as cm:
-                    locking.create_pid_lock(self.lockfile, stale_seconds=3600)
+                    locking.create_pid_lock(
+                        self.lockfile, stale_seconds=3600, clock=_now
+                    )
                 self.assertEqual(cm.exception.code, 3)
                 mock_log.assert_called_with(
                     "Failed to acquire lockfile after cleanup. Exiting."
                 )
 
-    @patch("time.time")
-    def test_unreadable_recent(self, mock_time):
-        current_time = 10000.0
-        mock_time.return_value = current_time
-        
-        self.lockfile.write_text("garbage")
-        old_mtime = current_time - 1000
-        os.utime(self.lockfile, (old_mtime, old_mtime))
+    def test_unreadable_recent(self):
+        self._write_lock("garbage", age=1000)
 
         with self.assertRaises(SystemExit) as cm:
-            locking.create_pid_lock(self.lockfile, stale_seconds=3600)
+            locking.create_pid_lock(self.lockfile, stale_seconds=3600, clock=_now)
         self.assertEqual(cm.exception.code, 3)
 
     @patch.object(Path, "mkdir", side_effect=OSError("mkdir fail"))
@@ -151,9 +152,7 @@ class TestLocking(unittest.TestCase):
         with patch.object(Path, "read_text", side_effect=OSError("read fail")):
             with patch.object(Path, "mkdir"):
                 with patch("time.time", return_value=10000.0):
-                    with patch("pathlib.Path.stat") as mock_stat:
-                        mock_stat.return_value.st_mtime = 9000.0
-                        
+                    with patch("pathlib.Path.stat", return_value=_RECENT_LOCK_STAT):
                         with self.assertRaises(SystemExit) as cm:
                             locking.create_pid_lock(self.lockfile)
                         self.assertEqual(cm.exception.code, 3)
@@ -172,25 +171,20 @@ class TestLocking(unittest.TestCase):
             mock_kill.side_effect = OSError
             self.assertTrue(locking._is_process_alive(123))
 
-    @patch("projectrestore.modules.locking._is_process_alive")
-    @patch("time.time")
-    def test_stale_lock_race_condition(self, mock_time, mock_alive):
-        mock_alive.return_value = False
-        current_time = 10000.0
-        mock_time.return_value = current_time
-        
-        self.lockfile.write_text("12345")
-        old_mtime = current_time - 4000
-        os.utime(self.lockfile, (old_mtime, old_mtime))
+    def test_stale_lock_race_condition(self):
+        self._write_lock("12345", age=4000)
 
         original_open = os.open
+        lock_str = str(self.lockfile)
         def side_effect_open(path, flags, *args):
-            if str(path) == str(self.lockfile) and (flags & os.O_EXCL):
+            if path == lock_str and (flags & os.O_EXCL):
                 raise FileExistsError
             return original_open(path, flags, *args)
 
         with patch("os.open", side_effect=side_effect_open):
             with patch("pathlib.Path.unlink", side_effect=lambda: None):
                 with self.assertRaises(SystemExit) as cm:
-                    locking.create_pid_lock(self.lockfile, stale_seconds=3600)
+                    locking.create_pid_lock(
+                        self.lockfile, stale_seconds=3600, clock=_now, is_alive=_dead
+                    )
                 self.assertEqual(cm.exception.code, 3)
@@ -1,12 +1,13 @@
 # tests/modules/test_utils.py
 
+import os
 import shutil
 import tempfile
-import time
 import unittest
 from pathlib import Path
 from unittest.mock import patch
 from projectrestore.modules import utils
+from _fsutil import fast_rmtree
 
 
 class TestFindLatestBackup(unittest.TestCase):
@@ -15,16 +16,16 @@ class TestFindLatestBackup(unittest.TestCase):
         self.pattern = "test-*.tar.gz"
 
     def tearDown(self):
-        if self.backup_dir.exists():
-            shutil.rmtree(self.backup_dir)
+        shutil.rmtree(self.backup_dir, ignore_errors=True)
 
     def test_find_latest(self):
         # Create files with mtimes
         file1 = self.backup_dir / "test-old-1.tar.gz"
         file1.touch()
-        time.sleep(0.1)
+        os.utime(file1, (1000.0, 1000.0))
         file2 = self.backup_dir / "test-new-2.tar.gz"
         file2.touch()
+        os.utime(file2, (2000.0, 2000.0))
 
         latest = utils.find_latest_backup(self.backup_dir, self.pattern)
         self.assertEqual(latest, file2)
@@ -34,7 +35,7 @@ class TestFindLatestBackup(unittest.TestCase):
         self.assertIsNone(latest)
 
     def test_non_dir(self):
-        non_dir = Path(tempfile.mktemp())
+        non_dir = self.backup_dir / "does-not-exist"
         with patch("projectrestore.modules.utils.Path") as mock_path:
             mock_instance = mock_path.return_value
             mock_instance.exists.return_value = False
@@ -43,14 +44,17 @@ class TestFindLatestBackup(unittest.TestCase):
 
 
 class TestCountFiles(unittest.TestCase):
-    def setUp(self):
-        self.temp_dir = Path(tempfile.mkdtemp())
-        (self.temp_dir / "file1.txt").touch()
-        (self.temp_dir / "dir").mkdir()
-        (self.temp_dir / "dir" / "file2.txt").touch()  # only files counted
-
-    def tearDown(self):
-        shutil.rmtree(self.temp_dir)
+    @classmethod
+    def setUpClass(cls):
+        # count_files only reads the tree, so tests share it
+        cls.temp_dir = Path(tempfile.mkdtemp())
+        (cls.temp_dir / "file1.txt").touch()
+        (cls.temp_dir / "dir").mkdir()
+        (cls.temp_dir / "dir" / "file2.txt").touch()  # only files counted
+
+    @classmethod
+    def tearDownClass(cls):
+        fast_rmtree(cls.temp_dir)
 
     def test_count(self):
         count = utils.count_files(self.temp_dir)
@@ -0,0 +1,318 @@
+# tests/modules/test_uring.py
+
+import errno
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+from projectrestore.modules import uring
+
+
+def _ring_or_skip(test, objects_dir):
+    try:
+        return uring.UringRestoreEngine(str(objects_dir))
+    except OSError as e:
+        test.skipTest(f"io_uring unavailable: {e}")
+
+
+class TestUringRestoreEngine(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.objects = self.temp_dir / "objects"
+        self.dest = self.temp_dir / "dest"
+        self.objects.mkdir()
+        self.dest.mkdir()
+        self.engine = _ring_or_skip(self, self.objects)
+
+    def tearDown(self):
+        if getattr(self, "engine", None):
+            self.engine.close()
+        if self.temp_dir.exists():
+            shutil.rmtree(self.temp_dir)
+
+    def _job(self, name, content):
+        (self.objects / name).write_bytes(content)
+        return name, str(self.dest / name)
+
+    def test_restore_many_files(self):
+        jobs = [self._job(f"obj{i}", f"content {i}".encode()) for i in range(200)]
+        errors = self.engine.restore_files(jobs)
+        self.assertEqual(errors, [None] * len(jobs))
+        for i, (_, dst) in enumerate(jobs):
+            self.assertEqual(Path(dst).read_bytes(), f"content {i}".encode())
+
+    def test_empty_object(self):
+        jobs = [self._job("empty", b"")]
+        self.assertEqual(self.engine.restore_files(jobs), [None])
+        self.assertEqual(Path(jobs[0][1]).read_bytes(), b"")
+
+    def test_decode_applied(self):
+        jobs = [self._job("obj", b"abc")]
+        errors = self.engine.restore_files(jobs, decode=lambda b: bytes(b).upper())
+        self.assertEqual(errors, [None])
+        self.assertEqual(Path(jobs[0][1]).read_bytes(), b"ABC")
+
+    def test_missing_object(self):
+        good = self._job("good", b"ok")
+        missing = ("missing", str(self.dest / "missing"))
+        errors = self.engine.restore_files([good, missing])
+        self.assertIsNone(errors[0])
+        self.assertIsInstance(errors[1], FileNotFoundError)
+        self.assertEqual(errors[1].filename, str(self.objects / "missing"))
+        self.assertFalse(os.path.exists(missing[1]))
+
+    def test_decode_failure_removes_dest(self):
+        jobs = [self._job("obj", b"abc")]
+
+        def bad_decode(_):
+            raise ValueError("corrupt")
+
+        errors = self.engine.restore_files(jobs, decode=bad_decode)
+        self.assertIn("corrupt", str(errors[0]))
+        self.assertFalse(os.path.exists(jobs[0][1]))
+
+    def test_oversized_uses_fallback(self):
+        jobs = [self._job("big", b"x" * 32)]
+        fallback = MagicMock()
+        with patch.object(uring, "MAX_BUFFERED_SIZE", 16):
+            errors = self.engine.restore_files(jobs, fallback=fallback)
+        self.assertEqual(errors, [None])
+        fallback.assert_called_once_with(0, str(self.objects / "big"), jobs[0][1])
+
+    def test_payload_too_large_uses_fallback(self):
+        jobs = [self._job("bomb", b"small")]
+        fallback = MagicMock()
+
+        def decode(_):
+            raise uring.PayloadTooLarge("inflates too far")
+
+        errors = self.engine.restore_files(jobs, decode=decode, fallback=fallback)
+        self.assertEqual(errors, [None])
+        fallback.assert_called_once_with(0, str(self.objects / "bomb"), jobs[0][1])
+
+    def test_batch_byte_budget_uses_fallback(self):
+        jobs = [self._job(f"obj{i}", b"x" * 8) for i in range(3)]
+        fallback = MagicMock()
+        with patch.object(uring, "MAX_BATCH_BYTES", 16):
+            errors = self.engine.restore_files(jobs, fallback=fallback)
+        self.assertEqual(errors, [None] * 3)
+        fallback.assert_called_once_with(2, str(self.objects / "obj2"), jobs[2][1])
+        for _, dst in jobs[:2]:
+            self.assertEqual(Path(dst).read_bytes(), b"x" * 8)
+
+    def test_raw_copy_keeps_object_mode_and_times(self):
+        jobs = [self._job("raw", b"abc")]
+        os.chmod(self.objects / "raw", 0o751)
+        os.utime(self.objects / "raw", (400, 500))
+        self.assertEqual(self.engine.restore_files(jobs), [None])
+        st = os.stat(jobs[0][1])
+        self.assertEqual(st.st_mode & 0o7777, 0o751)
+        self.assertEqual((st.st_atime, st.st_mtime), (400, 500))
+
+    def test_decoded_copy_gets_default_mode(self):
+        jobs = [self._job("obj", b"abc")]
+        os.chmod(self.objects / "obj", 0o751)
+        os.utime(self.objects / "obj", (400, 500))
+        umask = os.umask(0o022)
+        try:
+            errors = self.engine.restore_files(jobs, decode=lambda b: bytes(b).upper())
+        finally:
+            os.umask(umask)
+        self.assertEqual(errors, [None])
+        st = os.stat(jobs[0][1])
+        self.assertEqual(st.st_mode & 0o7777, 0o644)
+        self.assertNotEqual(st.st_mtime, 500)
+
+    def test_ring_failure_falls_back_without_leaking(self):
+        L = uring.liburing
+        jobs = [self._job(f"obj{i}", b"data") for i in range(3)]
+        fallback = MagicMock()
+        with patch.object(L, "io_uring_prep_read", side_effect=RuntimeError("boom")), \
+             patch.object(L, "io_uring_prep_read_fixed", side_effect=RuntimeError("boom")):
+            errors = self.engine.restore_files(jobs, fallback=fallback)
+        self.assertEqual(errors, [None] * 3)
+        self.assertEqual(
+            [c.args for c in fallback.call_args_list],
+            [(i, str(self.objects / f"obj{i}"), dst) for i, (_, dst) in enumerate(jobs)],
+        )
+        # The ring is torn down; no destination fd or partial file is left behind
+        self.assertTrue(self.engine._closed)
+        open_paths = [os.path.realpath(f"/proc/self/fd/{fd}") for fd in os.listdir("/proc/self/fd")]
+        self.assertFalse([p for p in open_paths if p.startswith(os.path.realpath(self.dest))])
+        self.assertEqual(os.listdir(self.dest), [])
+
+    def test_abort_drains_in_flight_requests(self):
+        L = uring.liburing
+        jobs = [self._job(f"obj{i}", b"data") for i in range(3)]
+        real_wait = L.io_uring_wait_cqe_nr
+        calls = []
+
+        def interrupted_wait(*args):
+            calls.append(args)
+            # Pass 2 (reads) is submitted, then the wait is interrupted
+            if len(calls) == 2:
+                raise RuntimeError("interrupted")
+            return real_wait(*args)
+
+        with patch.object(L, "io_uring_wait_cqe_nr", side_effect=interrupted_wait), \
+             patch.object(L, "io_uring_prep_cancel64", wraps=L.io_uring_prep_cancel64) as cancel:
+            errors = self.engine.restore_files(jobs, fallback=MagicMock())
+        self.assertEqual(errors, [None] * 3)
+        cancel.assert_called_once()
+        self.assertEqual((self.engine._queued, self.engine._inflight), (0, 0))
+        self.assertTrue(self.engine._closed)
+
+    def test_short_write_is_resubmitted(self):
+        L = uring.liburing
+        jobs = [self._job("obj", b"0123456789")]
+        real_write = L.io_uring_prep_write
+        keep = []
+
+        def half_write(sqe, fd, data, offset):
+            # Submit at most half of what is asked, as a short write would
+            chunk = bytes(data[: max(1, len(data) // 2)])
+            keep.append(chunk)
+            return real_write(sqe, fd, chunk, offset)
+
+        with patch.object(L, "io_uring_prep_write", side_effect=half_write) as write:
+            errors = self.engine.restore_files(jobs)
+        self.assertEqual(errors, [None])
+        self.assertGreater(write.call_count, 1)
+        self.assertEqual(Path(jobs[0][1]).read_bytes(), b"0123456789")
+
+    def test_short_read_uses_fallback(self):
+        L = uring.liburing
+        # Larger than a slab, so the object is read into its own buffer
+        jobs = [self._job("obj", b"x" * (uring.SLAB_SIZE + 8))]
+        real_read = L.io_uring_prep_read
+        keep = []
+
+        def short_read(sqe, fd, buf, offset):
+            keep.append(bytearray(len(buf) // 2))
+            return real_read(sqe, fd, keep[-1], offset)
+
+        fallback = MagicMock()
+        with patch.object(L, "io_uring_prep_read", side_effect=short_read):
+            errors = self.engine.restore_files(jobs, fallback=fallback)
+        self.assertEqual(errors, [None])
+        fallback.assert_called_once_with(0, str(self.objects / "obj"), jobs[0][1])
+
+    def test_failed_close_is_reported(self):
+        L = uring.liburing
+        jobs = [self._job("obj", b"data")]
+        real_close = L.io_uring_prep_close
+
+        def close_twice(sqe, fd):
+            # Closing an fd that is already closed fails with EBADF
+            os.close(fd)
+            return real_close(sqe, fd)
+
+        with patch.object(L, "io_uring_prep_close", side_effect=close_twice):
+            errors = self.engine.restore_files(jobs)
+        self.assertIsInstance(errors[0], OSError)
+        self.assertEqual(errors[0].errno, errno.EBADF)
+        self.assertFalse(os.path.exists(jobs[0][1]))
+
+    def test_ring_failure_without_fallback_reports_errors(self):
+        L = uring.liburing
+        jobs = [self._job("a", b"aaa")]
+        with patch.object(L, "io_uring_prep_write", side_effect=RuntimeError("boom")):
+            errors = self.engine.restore_files(jobs)
+        self.assertIsInstance(errors[0], RuntimeError)
+        self.assertFalse(os.path.exists(jobs[0][1]))
+
+    def test_finish_runs_on_open_fd(self):
+        jobs = [self._job("a", b"aaa"), self._job("b", b"")]
+        seen = []
+
+        def finish(index, fd):
+            os.fchmod(fd, 0o600)
+            seen.append(index)
+
+        errors = self.engine.restore_files(jobs, finish=finish)
+        self.assertEqual(errors, [None, None])
+        self.assertEqual(sorted(seen), [0, 1])
+        for _, dst in jobs:
+            self.assertEqual(os.stat(dst).st_mode & 0o777, 0o600)
+
+    def test_registered_slabs_used(self):
+        L = uring.liburing
+        if self.engine._slabs is None:
+            self.skipTest("io_uring buffer registration refused")
+        jobs = [self._job(f"obj{i}", b"x" * (i + 1)) for i in range(4)]
+        jobs.append(self._job("large", b"y" * (uring.SLAB_SIZE + 1)))
+        with patch.object(L, "io_uring_prep_read_fixed", wraps=L.io_uring_prep_read_fixed) as read_fixed, \
+             patch.object(L, "io_uring_prep_read", wraps=L.io_uring_prep_read) as read:
+            errors = self.engine.restore_files(jobs)
+        self.assertEqual(errors, [None] * 5)
+        self.assertEqual(read_fixed.call_count, 4)
+        self.assertEqual(read.call_count, 1)
+        for i, (_, dst) in enumerate(jobs[:4]):
+            self.assertEqual(Path(dst).read_bytes(), b"x" * (i + 1))
+        self.assertEqual(Path(jobs[4][1]).read_bytes(), b"y" * (uring.SLAB_SIZE + 1))
+
+    def test_slabs_registered_once(self):
+        L = uring.liburing
+        self.engine.close()
+        with patch.object(L, "io_uring_register_buffers", wraps=L.io_uring_register_buffers) as register:
+            self.engine = _ring_or_skip(self, self.objects)
+            # Two restores of more than one batch each reuse the same slabs
+            for round_ in range(2):
+                jobs = [self._job(f"r{round_}_{i}", b"z" * i) for i in range(200)]
+                self.assertEqual(self.engine.restore_files(jobs), [None] * 200)
+        self.assertEqual(register.call_count, 1)
+
+    def test_slab_registration_refused(self):
+        L = uring.liburing
+        self.engine.close()
+        with patch.object(L, "io_uring_register_buffers", side_effect=OSError(12, "ENOMEM")):
+            self.engine = _ring_or_skip(self, self.objects)
+        jobs = [self._job("a", b"aaa")]
+        with patch.object(L, "io_uring_prep_read_fixed") as read_fixed:
+            errors = self.engine.restore_files(jobs)
+        self.assertEqual(errors, [None])
+        read_fixed.assert_not_called()
+        self.assertEqual(Path(jobs[0][1]).read_bytes(), b"aaa")
+
+    def test_single_issuer(self):
+        self.engine.restore_files([self._job("a", b"a")])
+        errors = []
+
+        def other_thread():
+            try:
+                self.engine.restore_files([self._job("b", b"b")])
+            except RuntimeError as e:
+                errors.append(e)
+
+        t = threading.Thread(target=other_thread)
+        t.start()
+        t.join()
+        self.assertEqual(len(errors), 1)
+
+
+class TestUringSetupFlags(unittest.TestCase):
+    def test_falls_back_to_plain_ring(self):
+        if not uring.is_available():
+            self.skipTest("liburing not installed")
+        L = uring.liburing
+        # SQPOLL + DEFER_TASKRUN is rejected by the kernel
+        invalid = L.IORING_SETUP_SQPOLL | L.IORING_SETUP_DEFER_TASKRUN
+        temp_dir = tempfile.mkdtemp()
+        try:
+            with patch.object(uring, "_setup_flag_sets", return_value=[invalid, 0]):
+                engine = _ring_or_skip(self, temp_dir)
+            self.assertEqual(engine.flags, 0)
+            engine.close()
+        finally:
+            shutil.rmtree(temp_dir)
+
+
+class TestUringUnavailable(unittest.TestCase):
+    def test_missing_liburing(self):
+        with patch.object(uring, "liburing", None):
+            self.assertFalse(uring.is_available())
+            with self.assertRaises(OSError):
+                uring.UringRestoreEngine("/nonexistent")
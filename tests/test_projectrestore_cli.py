@@ -3,6 +3,8 @@
 
 """
 test_projectrestore.cli.py - Unit and integration tests for projectrestore.cli.py
+
+The tests share no state, so they parallelise: pytest -n auto tests/
 """
 
 import shutil
@@ -18,45 +20,65 @@ from unittest import mock
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from projectrestore import cli
+from _fsutil import fast_rmtree, use_private_tmpfs_tempdir
+
+DEFAULT = mock.DEFAULT
+
+
+def _argv(*args):
+    """Patch cli's sys.argv through the already-imported module."""
+    return mock.patch.object(cli.sys, "argv", ["script.py", *args])
+
+
+# Keep scratch dirs on tmpfs when run directly
+use_private_tmpfs_tempdir()
 
 
 class TestCLIIntegration(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # One scratch root per class; each test works in its own subdirectory
+        cls._root = Path(tempfile.mkdtemp())
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls._root, ignore_errors=True)
+
     def setUp(self):
-        self.temp_dir = Path(tempfile.mkdtemp())
+        self.temp_dir = self._root / self._testMethodName
+        self.temp_dir.mkdir()
         self.backup_dir = self.temp_dir / "backups"
         self.backup_dir.mkdir()
         self.tar_path = self.backup_dir / "test-bot_platform-2023.tar.gz"
         self.tar_path.touch()  # Mock backup
 
     def tearDown(self):
-        shutil.rmtree(self.temp_dir)
-
-    @mock.patch("projectrestore.cli.safe_extract_atomic")
-    @mock.patch("projectrestore.cli.find_latest_backup")
-    @mock.patch("projectrestore.cli.count_files")
-    def test_main_success(self, mock_count, mock_find, mock_extract):
-        mock_find.return_value = self.tar_path
+        fast_rmtree(self.temp_dir)
+
+    @mock.patch.multiple(
+        cli,
+        safe_extract_atomic=DEFAULT,
+        find_latest_backup=DEFAULT,
+        count_files=DEFAULT,
+    )
+    def test_main_success(self, **mocks):
+        mock_extract, mock_count = mocks["safe_extract_atomic"], mocks["count_files"]
+        mocks["find_latest_backup"].return_value = self.tar_path
         mock_count.return_value = 1
 
-        with mock.patch(
-            "projectrestore.cli.sys.argv",
-            ["script.py", "--backup-dir", str(self.backup_dir)],
-        ):
+        with _argv("--backup-dir", str(self.backup_dir)):
             rc = cli.main()
 
         self.assertEqual(rc, 0)
         mock_extract.assert_called_once()
         mock_count.assert_called_once_with(mock.ANY)
 
-    @mock.patch("projectrestore.cli.safe_extract_atomic")
-    @mock.patch("projectrestore.cli.find_latest_backup")
-    def test_main_dry_run_success(self, mock_find, mock_extract):
-        mock_find.return_value = self.tar_path
+    @mock.patch.multiple(cli, safe_extract_atomic=DEFAULT, find_latest_backup=DEFAULT)
+    def test_main_dry_run_success(self, **mocks):
+        mock_extract = mocks["safe_extract_atomic"]
+        mocks["find_latest_backup"].return_value = self.tar_path
 
-        with mock.patch(
-            "projectrestore.cli.sys.argv",
-            ["script.py", "--backup-dir", str(self.backup_dir), "--dry-run"],
-        ):
+        with _argv("--backup-dir", str(self.backup_dir), "--dry-run"):
             rc = cli.main()
 
         self.assertEqual(rc, 0)
@@ -71,36 +93,27 @@ class TestCLIIntegration(unittest.TestCase):
         )
 
     def test_main_no_backup_dir(self):
-        with mock.patch(
-            "projectrestore.cli.sys.argv", ["script.py", "--backup-dir", "/nonexistent"]
-        ):
+        with _argv("--backup-dir", "/nonexistent"):
             rc = cli.main()
         self.assertEqual(rc, 1)
 
-    @mock.patch("projectrestore.cli.find_latest_backup")
+    @mock.patch.object(cli, "find_latest_backup")
     def test_main_no_backup_file(self, mock_find):
         mock_find.return_value = None
-        with mock.patch(
-            "projectrestore.cli.sys.argv",
-            ["script.py", "--backup-dir", str(self.backup_dir)],
-        ):
+        with _argv("--backup-dir", str(self.backup_dir)):
             rc = cli.main()
         self.assertEqual(rc, 1)
         mock_find.assert_called_once()
 
-    @mock.patch("projectrestore.cli.find_latest_backup")
-    @mock.patch("projectrestore.cli.verify_sha256_from_file", return_value=False)
-    def test_main_checksum_fail(self, mock_verify, mock_find):
-        mock_find.return_value = self.tar_path
-        with mock.patch(
-            "projectrestore.cli.sys.argv",
-            [
-                "script.py",
-                "--backup-dir",
-                str(self.backup_dir),
-                "--checksum",
-                "check.txt",
-            ],
+    @mock.patch.multiple(
+        cli, find_latest_backup=DEFAULT, verify_sha256_from_file=DEFAULT
+    )
+    def test_main_checksum_fail(self, **mocks):
+        mock_verify = mocks["verify_sha256_from_file"]
+        mock_verify.return_value = False
+        mocks["find_latest_backup"].return_value = self.tar_path
+        with _argv(
+            "--backup-dir", str(self.backup_dir), "--checksum", "check.txt"
         ):
             rc = cli.main()
         self.assertEqual(rc, 1)
@@ -109,15 +122,8 @@ class TestCLIIntegration(unittest.TestCase):
     @mock.patch.object(cli.Path, "mkdir", side_effect=OSError("mkdir fail"))
     def test_main_extract_dir_parent_fail(self, mock_mkdir):
         bad_extract = Path("/root/nonexistent/extract")
-        with mock.patch(
-            "projectrestore.cli.sys.argv",
-            [
-                "script.py",
-                "--backup-dir",
-                str(self.backup_dir),
-                "--extract-dir",
-                str(bad_extract),
-            ],
+        with _argv(
+            "--backup-dir", str(self.backup_dir), "--extract-dir", str(bad_extract)
         ):
             rc = cli.main()
         self.assertEqual(rc, 1)
@@ -136,33 +142,27 @@ class TestCLIIntegration(unittest.TestCase):
             ]
             mock_signal.assert_has_calls(calls, any_order=True)
 
-    @mock.patch("projectrestore.cli.create_pid_lock")
+    @mock.patch.object(cli, "create_pid_lock")
     def test_pidfile_locking_failure(self, mock_create_lock):
         """Simulate pidfile locking failure (another instance running)."""
         # Simulate SystemExit raised by create_pid_lock when locked
         mock_create_lock.side_effect = SystemExit(3)
 
-        with mock.patch(
-            "projectrestore.cli.sys.argv",
-            ["script.py", "--backup-dir", str(self.backup_dir)],
-        ):
+        with _argv("--backup-dir", str(self.backup_dir)):
             rc = cli.main()
 
         self.assertEqual(rc, 3)
         mock_create_lock.assert_called_once()
 
-    @mock.patch("projectrestore.cli.find_latest_backup")
-    @mock.patch("projectrestore.cli.safe_extract_atomic")
-    def test_invalid_archive_handling(self, mock_extract, mock_find):
+    @mock.patch.multiple(cli, find_latest_backup=DEFAULT, safe_extract_atomic=DEFAULT)
+    def test_invalid_archive_handling(self, **mocks):
         """Run against a corrupted .tar.gz file (simulated by exception)."""
-        mock_find.return_value = self.tar_path
+        mock_extract = mocks["safe_extract_atomic"]
+        mocks["find_latest_backup"].return_value = self.tar_path
         # Simulate extraction failure
         mock_extract.side_effect = ValueError("Invalid tar header")
 
-        with mock.patch(
-            "projectrestore.cli.sys.argv",
-            ["script.py", "--backup-dir", str(self.backup_dir)],
-        ):
+        with _argv("--backup-dir", str(self.backup_dir)):
             rc = cli.main()
 
         self.assertEqual(rc, 1) # General failure
@@ -171,8 +171,8 @@ class TestCLIIntegration(unittest.TestCase):
     def test_vault_restore_subcommand(self):
         """Test vault-restore subcommand dispatch."""
         with mock.patch("projectrestore.restore_engine.restore_snapshot") as mock_restore, \
-             mock.patch("projectrestore.cli.sys.argv", ["script.py", "vault-restore", "manifest.json", "dest_dir"]), \
-             mock.patch("projectrestore.cli.print_logo"):
+             _argv("vault-restore", "manifest.json", "dest_dir"), \
+             mock.patch.object(cli, "print_logo"):
 
             rc = cli.main()
             self.assertEqual(rc, 0)
@@ -176,9 +176,460 @@ def test_restore_file_write_failure(vault_structure, tmp_path, capsys):
     }
     manifest_path.write_text(json.dumps(manifest_data))
 
-    # Mock shutil.copy2 to raise exception
-    with patch("shutil.copy2", side_effect=OSError("Write failed")):
+    # Mock the in-kernel copy to raise exception (regular copy path)
+    with patch.object(restore_engine.os, "copy_file_range", side_effect=OSError("Write failed")), \
+         patch.object(restore_engine, "_create_uring_engine", return_value=None):
         restore_engine.restore_snapshot(str(manifest_path), str(dest_path))
 
     captured = capsys.readouterr()
     assert "Failed to restore file.txt" in captured.out
+
+def test_restore_uring_path(vault_structure, tmp_path, capsys):
+    vault, snapshots, objects = vault_structure
+    manifest_path = snapshots / "manifest.json"
+    dest_path = tmp_path / "restore_dest"
+
+    # One legacy (raw) object and one zstd-compressed object
+    (objects / "raw").write_bytes(b"raw content")
+    (objects / "zst").write_bytes(restore_engine.zstd.ZstdCompressor().compress(b"zstd content"))
+    manifest_data = {
+        "version": 2,
+        "files": {
+            "raw.txt": {"hash": "raw", "mode": 0o600, "mtime": 1000},
+            "sub/zst.txt": {"hash": "zst"},
+            "gone.txt": {"hash": "gone"},
+        }
+    }
+    manifest_path.write_text(json.dumps(manifest_data))
+
+    engine = restore_engine._create_uring_engine(str(objects))
+    if engine is None:
+        pytest.skip("io_uring unavailable")
+
+    with patch.object(restore_engine, "_create_uring_engine", return_value=engine), \
+         patch.object(restore_engine, "URING_MIN_FILES", 0), \
+         patch.object(restore_engine, "URING_MIN_BYTES", 0):
+        restore_engine.restore_snapshot(str(manifest_path), str(dest_path))
+
+    assert (dest_path / "raw.txt").read_bytes() == b"raw content"
+    assert (dest_path / "sub" / "zst.txt").read_bytes() == b"zstd content"
+    st = os.stat(dest_path / "raw.txt")
+    assert st.st_mode & 0o777 == 0o600
+    assert st.st_mtime == 1000
+    assert "ERROR: Missing object gone for file gone.txt" in capsys.readouterr().out
+    assert not (dest_path / "gone.txt").exists()
+
+def test_restore_small_manifest_skips_uring(vault_structure, tmp_path):
+    vault, snapshots, objects = vault_structure
+    manifest_path = snapshots / "manifest.json"
+    dest_path = tmp_path / "restore_dest"
+
+    files = {}
+    for i in range(restore_engine.URING_MIN_FILES):
+        (objects / f"obj{i}").write_bytes(b"tiny")
+        files[f"f{i}.txt"] = {"hash": f"obj{i}", "size": 4}
+    manifest_path.write_text(json.dumps({"version": 2, "files": files}))
+
+    with patch.object(restore_engine, "_create_uring_engine") as mock_engine:
+        restore_engine.restore_snapshot(str(manifest_path), str(dest_path))
+
+    # Enough files, but far below URING_MIN_BYTES
+    mock_engine.assert_not_called()
+    assert (dest_path / "f0.txt").read_bytes() == b"tiny"
+
+def test_manifest_load_is_cached(vault_structure):
+    vault, snapshots, objects = vault_structure
+    manifest_path = snapshots / "manifest.json"
+    manifest_path.write_text(json.dumps({"version": 2, "files": {}}))
+    restore_engine._load_manifest_cached.cache_clear()
+
+    with patch.object(restore_engine, "_read_manifest", wraps=restore_engine._read_manifest) as mock_load:
+        first = restore_engine._load_manifest(str(manifest_path))
+        assert restore_engine._load_manifest(str(manifest_path)) is first
+        assert mock_load.call_count == 1
+
+        # A rewritten manifest (new size/mtime) is parsed again
+        manifest_path.write_text(json.dumps({"version": 2, "files": {"a": "h"}}))
+        os.utime(manifest_path, ns=(1, 1))
+        assert restore_engine._load_manifest(str(manifest_path))["files"] == {"a": "h"}
+        assert mock_load.call_count == 2
+
+def test_restore_threaded_copy_path(vault_structure, tmp_path):
+    vault, snapshots, objects = vault_structure
+    manifest_path = snapshots / "manifest.json"
+    dest_path = tmp_path / "restore_dest"
+
+    files = {}
+    for i in range(20):
+        (objects / f"obj{i}").write_bytes(restore_engine.zstd.ZstdCompressor().compress(f"data {i}".encode()))
+        files[f"d{i % 3}/f{i}.txt"] = {"hash": f"obj{i}", "mode": 0o640}
+    files["missing_obj.txt"] = {"hash": "nope"}
+    manifest_path.write_text(json.dumps({"version": 2, "files": files}))
+
+    with patch.object(restore_engine, "_create_uring_engine", return_value=None):
+        restore_engine.restore_snapshot(str(manifest_path), str(dest_path))
+
+    for i in range(20):
+        restored = dest_path / f"d{i % 3}" / f"f{i}.txt"
+        assert restored.read_bytes() == f"data {i}".encode()
+        assert os.stat(restored).st_mode & 0o777 == 0o640
+    assert not (dest_path / "missing_obj.txt").exists()
+
+def test_copy_raw_object_falls_back_to_sendfile(tmp_path):
+    src = tmp_path / "obj"
+    src.write_bytes(b"legacy object")
+    os.chmod(src, 0o640)
+    os.utime(src, (500, 500))
+    dst = tmp_path / "out"
+
+    unsupported = OSError(restore_engine.errno.EXDEV, "cross-device")
+    with patch.object(restore_engine.os, "copy_file_range", side_effect=unsupported):
+        restore_engine._copy_object(str(src), str(dst))
+
+    assert dst.read_bytes() == b"legacy object"
+    st = os.stat(dst)
+    assert st.st_mode & 0o777 == 0o640
+    assert st.st_mtime == 500
+
+def test_copy_object_inflates_in_memory(tmp_path):
+    src = tmp_path / "obj"
+    src.write_bytes(restore_engine.zstd.ZstdCompressor().compress(b"data" * 1000))
+    dst = tmp_path / "out"
+
+    with patch.object(restore_engine.cas, "restore_object_to_file") as mock_cas:
+        restore_engine._copy_object(str(src), str(dst))
+
+    mock_cas.assert_not_called()
+    assert dst.read_bytes() == b"data" * 1000
+
+def test_copy_object_streams_large_compressed(tmp_path):
+    src = tmp_path / "obj"
+    src.write_bytes(restore_engine.zstd.ZstdCompressor().compress(b"data" * 1000))
+    dst = tmp_path / "out"
+
+    with patch.object(restore_engine.uring, "MAX_BUFFERED_SIZE", 4), \
+         patch.object(restore_engine, "_inflate_object") as mock_inflate:
+        restore_engine._copy_object(str(src), str(dst))
+
+    mock_inflate.assert_not_called()
+    assert dst.read_bytes() == b"data" * 1000
+
+def test_copy_object_streams_frame_without_content_size(tmp_path):
+    # cas.store_object writes through copy_stream, which records no content size
+    compressor = restore_engine.zstd.ZstdCompressor(write_content_size=False).compressobj()
+    src = tmp_path / "obj"
+    src.write_bytes(compressor.compress(b"data" * 1000) + compressor.flush())
+    dst = tmp_path / "out"
+
+    with patch.object(restore_engine, "_inflate_object") as mock_inflate:
+        restore_engine._copy_object(str(src), str(dst))
+
+    mock_inflate.assert_not_called()
+    assert dst.read_bytes() == b"data" * 1000
+
+def test_decode_object_without_content_size():
+    # Streaming compressors don't record the content size in the frame header
+    compressor = restore_engine.zstd.ZstdCompressor(write_content_size=False).compressobj()
+    frame = bytearray(compressor.compress(b"stream") + compressor.flush())
+    assert restore_engine._decode_object(frame) == b"stream"
+    assert restore_engine._decode_object(bytearray(b"raw")) == b"raw"
+
+def test_decode_object_refuses_to_inflate_past_limit():
+    # A few KB of zeros that inflate to far more than the buffer limit
+    bomb = bytearray(restore_engine.zstd.ZstdCompressor().compress(bytes(64 * 1024)))
+    compressor = restore_engine.zstd.ZstdCompressor(write_content_size=False).compressobj()
+    unsized_bomb = bytearray(compressor.compress(bytes(64 * 1024)) + compressor.flush())
+
+    with patch.object(restore_engine.uring, "MAX_BUFFERED_SIZE", 1024):
+        with pytest.raises(restore_engine.uring.PayloadTooLarge):
+            restore_engine._decode_object(bomb)
+        with pytest.raises(restore_engine.uring.PayloadTooLarge):
+            restore_engine._decode_object(unsized_bomb)
+
+def test_parent_dirs_created_once(vault_structure, tmp_path):
+    vault, snapshots, objects = vault_structure
+    manifest_path = snapshots / "manifest.json"
+    dest_path = tmp_path / "restore_dest"
+
+    (objects / "h").write_bytes(b"x")
+    files = {f"a/b/f{i}.txt": {"hash": "h"} for i in range(5)}
+    files["a/top.txt"] = {"hash": "h"}
+    manifest_path.write_text(json.dumps({"version": 2, "files": files}))
+
+    with patch.object(restore_engine.os, "makedirs", wraps=os.makedirs) as mock_makedirs:
+        restore_engine.restore_snapshot(str(manifest_path), str(dest_path))
+
+    # destination root + "a" + "a/b", not one call per file
+    assert mock_makedirs.call_count == 3
+    assert (dest_path / "a" / "b" / "f4.txt").read_bytes() == b"x"
+
+@pytest.mark.parametrize("rel_path, unsafe", [
+    ("../evil.txt", True),
+    ("a/../b.txt", True),
+    ("/etc/passwd", True),
+    ("C:\\evil.txt", True),
+    ("a\\..\\b.txt", True),
+    ("a/b.txt", False),
+    ("..hidden/file", False),
+    ("./a.txt", False),
+])
+def test_unsafe_paths_are_skipped(tmp_path, capsys, rel_path, unsafe):
+    objects = tmp_path / "objects"
+    objects.mkdir()
+    (objects / "h").write_bytes(b"x")
+    dest = tmp_path / "dest"
+    dest.mkdir()
+
+    restored, skipped = restore_engine._restore_files({rel_path: "h"}, str(objects), str(dest))
+
+    assert (restored, skipped) == ((0, 1) if unsafe else (1, 0))
+    assert (f"Skipping unsafe path '{rel_path}'" in capsys.readouterr().out) is unsafe
+
+def test_restore_logs_files_instead_of_printing(vault_structure, tmp_path, capsys, caplog):
+    vault, snapshots, objects = vault_structure
+    manifest_path = snapshots / "manifest.json"
+    dest_path = tmp_path / "restore_dest"
+
+    (objects / "h").write_bytes(b"x")
+    files = {f"f{i}.txt": "h" for i in range(4)}
+    manifest_path.write_text(json.dumps({"files": files}))
+
+    with caplog.at_level("DEBUG", logger=restore_engine.__name__), \
+         patch.object(restore_engine, "PROGRESS_INTERVAL", 2):
+        restore_engine.restore_snapshot(str(manifest_path), str(dest_path))
+
+    captured = capsys.readouterr()
+    assert "Restoring: f0.txt" not in captured.out
+    assert "Restored: 4" in captured.out
+    assert "Restoring: f0.txt" in caplog.text
+    assert "Restored 2 files..." in caplog.text
+    assert "Restored 4 files..." in caplog.text
+
+def test_copy_object_relative_to_objects_fd(tmp_path):
+    objects = tmp_path / "objects"
+    objects.mkdir()
+    (objects / "h1").write_bytes(b"by dir fd")
+    dst = tmp_path / "out"
+
+    objects_fd = os.open(objects, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        # The object name is resolved relative to the directory fd
+        restore_engine._copy_object(
+            str(tmp_path / "elsewhere" / "h1"), str(dst), objects_fd, object_name="h1"
+        )
+    finally:
+        os.close(objects_fd)
+
+    assert dst.read_bytes() == b"by dir fd"
+
+@pytest.mark.parametrize("file_hash", ["ab/cdef", "ab\\cdef", "..", "../objects/cdef"])
+def test_restore_rejects_hash_outside_objects_dir(tmp_path, capsys, file_hash):
+    objects = tmp_path / "objects"
+    (objects / "ab").mkdir(parents=True)
+    (objects / "ab" / "cdef").write_bytes(b"nested")
+    (objects / "cdef").write_bytes(b"wrong object")
+    dest = tmp_path / "dest"
+    dest.mkdir()
+
+    restored, skipped = restore_engine._restore_files(
+        {"f.txt": {"hash": file_hash}}, str(objects), str(dest)
+    )
+
+    assert (restored, skipped) == (0, 1)
+    assert f"invalid object hash '{file_hash}'" in capsys.readouterr().out
+    assert not (dest / "f.txt").exists()
+
+@pytest.mark.parametrize("order", ["file_first", "link_first"])
+def test_symlink_in_manifest_cannot_redirect_file_writes(tmp_path, capsys, order):
+    objects = tmp_path / "objects"
+    objects.mkdir()
+    (objects / "h").write_bytes(b"payload")
+    outside = tmp_path / "outside"
+    outside.mkdir()
+    dest = tmp_path / "dest"
+    dest.mkdir()
+
+    entries = [
+        ("a/passwd", {"hash": "h"}),
+        ("a", {"type": "symlink", "target": str(outside)}),
+    ]
+    if order == "link_first":
+        entries.reverse()
+    restored, skipped = restore_engine._restore_files(dict(entries), str(objects), str(dest))
+
+    assert (restored, skipped) == (1, 1)
+    assert "Skipping 'a'" in capsys.readouterr().out
+    assert list(outside.iterdir()) == []
+    assert not (dest / "a").is_symlink()
+    assert (dest / "a" / "passwd").read_bytes() == b"payload"
+
+def test_stale_symlink_parent_is_replaced(tmp_path):
+    objects = tmp_path / "objects"
+    objects.mkdir()
+    (objects / "h").write_bytes(b"payload")
+    outside = tmp_path / "outside"
+    outside.mkdir()
+    dest = tmp_path / "dest"
+    dest.mkdir()
+    # Left by an earlier restore of a snapshot where "a" was a link
+    (dest / "a").symlink_to(outside)
+
+    files = {"a/b/passwd": {"hash": "h"}, "l": {"type": "symlink", "target": "a/b/passwd"}}
+    assert restore_engine._restore_files(files, str(objects), str(dest)) == (2, 0)
+
+    assert list(outside.iterdir()) == []
+    assert not (dest / "a").is_symlink()
+    assert (dest / "l").read_bytes() == b"payload"
+
+def test_rejected_entries_create_no_directories(tmp_path):
+    objects = tmp_path / "objects"
+    objects.mkdir()
+    (objects / "h").write_bytes(b"x")
+    dest = tmp_path / "dest"
+    dest.mkdir()
+
+    files = {
+        "bad_hash/f.txt": {"hash": "../h"},
+        "unknown/dev": {"type": "fifo"},
+        "no_target/l": {"type": "symlink"},
+        "ok/f.txt": {"hash": "h"},
+    }
+    assert restore_engine._restore_files(files, str(objects), str(dest)) == (1, 3)
+    assert sorted(p.name for p in dest.iterdir()) == ["ok"]
+
+def test_restore_files_returns_counts(tmp_path):
+    objects = tmp_path / "objects"
+    objects.mkdir()
+    (objects / "h").write_bytes(b"x")
+    dest = tmp_path / "dest"
+    dest.mkdir()
+
+    files = {"ok.txt": "h", "../bad.txt": "h", "gone.txt": "missing"}
+    assert restore_engine._restore_files(files, str(objects), str(dest)) == (1, 2)
+    assert (dest / "ok.txt").read_bytes() == b"x"
+
+def test_restore_hooks_do_not_touch_sys_path(vault_structure, tmp_path):
+    import sys
+    vault, snapshots, objects = vault_structure
+    manifest_path = snapshots / "manifest.json"
+    manifest_path.write_text(json.dumps({"files": {}}))
+    hooks = {"pre_restore": "true", "post_restore": "true"}
+
+    path_before = list(sys.path)
+    with patch.object(restore_engine, "run_hook") as mock_run_hook:
+        restore_engine.restore_snapshot(str(manifest_path), str(tmp_path / "dest"), hooks=hooks)
+        restore_engine.restore_snapshot(str(manifest_path), str(tmp_path / "dest"), hooks=hooks)
+
+    assert sys.path == path_before
+    assert mock_run_hook.call_count == 4
+    mock_run_hook.assert_any_call("pre_restore", "true")
+
+def test_objects_restored_in_hash_order(tmp_path):
+    objects = tmp_path / "objects"
+    objects.mkdir()
+    dest = tmp_path / "dest"
+    dest.mkdir()
+    files = {}
+    for rel_path, file_hash in [("z.txt", "aa"), ("a.txt", "cc"), ("m.txt", "bb")]:
+        (objects / file_hash).write_bytes(file_hash.encode())
+        files[rel_path] = file_hash
+
+    with patch.object(restore_engine, "_restore_objects_threaded", return_value=[None] * 3) as mock_copy:
+        restore_engine._restore_files(files, str(objects), str(dest))
+
+    hashes = [file_hash for _, file_hash, _, _ in mock_copy.call_args[0][0]]
+    assert hashes == ["aa", "bb", "cc"]
+
+def test_metadata_applied_through_fd(vault_structure, tmp_path, capsys):
+    vault, snapshots, objects = vault_structure
+    manifest_path = snapshots / "manifest.json"
+    dest_path = tmp_path / "restore_dest"
+
+    (objects / "raw").write_bytes(b"raw")
+    (objects / "zst").write_bytes(restore_engine.zstd.ZstdCompressor().compress(b"zst"))
+    manifest_path.write_text(json.dumps({"version": 2, "files": {
+        "raw.txt": {"hash": "raw", "mode": 0o600, "mtime": 1000},
+        "zst.txt": {"hash": "zst", "mode": 0o640, "mtime": 2000},
+    }}))
+
+    # Path-based chmod must not be needed on the regular copy path
+    with patch.object(restore_engine, "_create_uring_engine", return_value=None), \
+         patch.object(restore_engine.os, "chmod", side_effect=AssertionError("path chmod")):
+        restore_engine.restore_snapshot(str(manifest_path), str(dest_path))
+
+    assert "Warning" not in capsys.readouterr().out
+    for name, mode, mtime in [("raw.txt", 0o600, 1000), ("zst.txt", 0o640, 2000)]:
+        st = os.stat(dest_path / name)
+        assert st.st_mode & 0o777 == mode
+        assert st.st_mtime == mtime
+
+@pytest.mark.parametrize("use_uring", [False, True])
+def test_v2_entry_without_mode_keeps_object_stat(vault_structure, tmp_path, use_uring):
+    vault, snapshots, objects = vault_structure
+    manifest_path = snapshots / "manifest.json"
+    dest_path = tmp_path / "restore_dest"
+
+    (objects / "raw").write_bytes(b"raw")
+    os.chmod(objects / "raw", 0o755)
+    os.utime(objects / "raw", (500, 500))
+    (objects / "timed").write_bytes(b"timed")
+    os.chmod(objects / "timed", 0o755)
+    manifest_path.write_text(json.dumps({"version": 2, "files": {
+        "raw.sh": {"hash": "raw"},
+        "timed.sh": {"hash": "timed", "mtime": 2000},
+    }}))
+
+    engine = restore_engine._create_uring_engine(str(objects)) if use_uring else None
+    if use_uring and engine is None:
+        pytest.skip("io_uring unavailable")
+    with patch.object(restore_engine, "_create_uring_engine", return_value=engine), \
+         patch.object(restore_engine, "URING_MIN_FILES", 0):
+        restore_engine.restore_snapshot(str(manifest_path), str(dest_path))
+
+    # Same as a V1 entry: the object's mode and times, like shutil.copy2 ...
+    st = os.stat(dest_path / "raw.sh")
+    assert st.st_mode & 0o777 == 0o755
+    assert st.st_mtime == 500
+    # ... with only the keys the manifest records overridden
+    st = os.stat(dest_path / "timed.sh")
+    assert st.st_mode & 0o777 == 0o755
+    assert st.st_mtime == 2000
+
+def test_restore_destination_sharing_vault_name_prefix(vault_structure, tmp_path):
+    vault, snapshots, objects = vault_structure
+    manifest_path = snapshots / "manifest.json"
+    manifest_path.write_text(json.dumps({"files": {}}))
+
+    # "<vault>_restore" starts with the vault path string but is not inside it
+    dest_path = tmp_path / (vault.name + "_restore")
+    restore_engine.restore_snapshot(str(manifest_path), str(dest_path))
+    assert dest_path.is_dir()
+
+def test_restore_msgpack_manifest(vault_structure, tmp_path):
+    msgpack = pytest.importorskip("msgpack")
+    vault, snapshots, objects = vault_structure
+    manifest_path = snapshots / "manifest.msgpack"
+    dest_path = tmp_path / "restore_dest"
+
+    (objects / "h").write_bytes(b"packed")
+    manifest_path.write_bytes(msgpack.packb({"version": 2, "files": {"f.txt": {"hash": "h"}}}))
+
+    restore_engine.restore_snapshot(str(manifest_path), str(dest_path))
+    assert (dest_path / "f.txt").read_bytes() == b"packed"
+
+def test_read_manifest_without_orjson(tmp_path):
+    manifest_path = tmp_path / "manifest.json"
+    manifest_path.write_text(json.dumps({"files": {"a": "h"}}))
+
+    with patch.object(restore_engine, "orjson", None), \
+         patch.object(restore_engine.manifest, "load_manifest", wraps=restore_engine.manifest.load_manifest) as mock_load:
+        assert restore_engine._read_manifest(str(manifest_path)) == {"files": {"a": "h"}}
+    mock_load.assert_called_once_with(str(manifest_path))
+
+def test_read_msgpack_manifest_requires_msgpack(tmp_path):
+    manifest_path = tmp_path / "manifest.msgpack"
+    manifest_path.write_bytes(b"\x80")
+
+    with patch.object(restore_engine, "msgpack", None):
+        with pytest.raises(ImportError, match="msgpack"):
+            restore_engine._read_manifest(str(manifest_path))
@@ -133,8 +133,8 @@ class TestRestoreExtended:
 
         dest = tmp_path / "dest"
 
-        # Mock shutil.copy2 to succeed
-        with patch("shutil.copy2"):
+        # Mock the object copy to succeed
+        with patch("projectrestore.restore_engine._copy_object"):
             # Mock os.chmod to fail
             with patch("projectrestore.restore_engine.os.chmod", side_effect=OSError("Chmod fail")):
                 restore_engine.restore_snapshot(str(manifest), str(dest))